@@ -0,0 +1,79 @@
+"""Import-time benchmark for the research graph.
+
+Imports ``assistant.graph`` in fresh interpreters and reports the cold-start
+cost. Exits non-zero when the median exceeds the budget or when a disabled
+provider's client library was imported anyway.
+
+    python benchmarks/import_time.py --budget-ms 1500 --sources web,wikipedia
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# Client libraries that belong to a single provider, Pinecone memory or the LLM
+PROVIDER_MODULES = (
+    "tavily",
+    "youtube_transcript_api",
+    "feedparser",
+    "pinecone",
+    "langchain_ollama",
+)
+
+PROBE = (
+    "import sys, time; t = time.perf_counter(); import assistant.graph; "
+    "print(time.perf_counter() - t); print(','.join(sorted(sys.modules)))"
+)
+
+
+def measure(env: dict) -> tuple[float, set]:
+    """Import the graph once in a clean interpreter; return (seconds, modules)."""
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return float(out[0]), set(out[1].split(","))
+
+
+def main() -> int:
+    """Time the imports and return 1 if the median exceeds the budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--sources", default="web,wikipedia",
+                        help="RESEARCH_SOURCES to enable while importing")
+    args = parser.parse_args()
+
+    env = {k: v for k, v in os.environ.items() if not k.startswith("PINECONE_")}
+    env["RESEARCH_SOURCES"] = args.sources
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+
+    started = time.perf_counter()
+    samples, modules = [], set()
+    for _ in range(args.runs):
+        seconds, modules = measure(env)
+        samples.append(seconds * 1000)
+    median = statistics.median(samples)
+
+    print(f"import assistant.graph: median {median:.0f} ms, "
+          f"min {min(samples):.0f} ms over {args.runs} runs "
+          f"({time.perf_counter() - started:.1f}s wall)")
+
+    # Nothing provider-specific should be imported just to build the graph
+    leaked = sorted(mod for mod in PROVIDER_MODULES if mod in modules)
+    if leaked:
+        print(f"FAIL: provider modules imported at graph import: {', '.join(leaked)}")
+        return 1
+    if median > args.budget_ms:
+        print(f"FAIL: median import time exceeds budget of {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Prompt-prefix reuse benchmark for summarize_sources.
+
+Simulates a multi-loop run and reports, per loop, how much of the summarizer
+prompt is a common prefix with the previous loop's prompt (and so can be
+served from Ollama's KV cache) versus how much must be prefilled again.
+The shipped layout (prompts.summarizer_context) and a summary-first
+alternative are compared with the baseline prompt summarize_sources built
+before the layout moved to prompts.py. Recalled memory evolves through the
+real recall_memory merge: chunks are ranked by score and the weakest are
+evicted past memory_max_chunks.
+
+With --ollama it also sends the prompts to a live Ollama server and prints
+the prompt_eval_count / prompt_eval_duration Ollama reports for each loop:
+
+    python benchmarks/prefix_reuse.py --loops 5
+    python benchmarks/prefix_reuse.py --ollama http://localhost:11434 --model llama3.2
+"""
+
+import argparse
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import assistant.graph as graph_module  # noqa: E402
+from assistant.prompts import summarizer_context, summarizer_instructions  # noqa: E402
+from assistant.state import SummaryState  # noqa: E402
+
+# The human message summarize_sources built inline before the layout moved to prompts.py
+BASELINE = """
+<User Input>
+{research_topic}
+</User Input>
+
+<Memory>
+{memory}
+</Memory>
+
+<Existing Summary>
+{existing_summary}
+</Existing Summary>
+
+<Background (Wikipedia)>
+{wikipedia}
+</Background (Wikipedia)>
+
+<Academic Findings (arXiv)>
+{arxiv}
+</Academic Findings (arXiv)>
+
+<Industry Examples (Web)>
+{web}
+</Industry Examples (Web)>
+
+<Industry Examples (YouTube)>
+{youtube}
+</Industry Examples (YouTube)>
+"""
+
+SUMMARY_FIRST = """<Existing Summary>
+{existing_summary}
+</Existing Summary>
+
+<User Input>
+{research_topic}
+</User Input>
+
+<Memory>
+{memory}
+</Memory>
+
+<Background (Wikipedia)>
+{wikipedia}
+</Background (Wikipedia)>
+
+<Academic Findings (arXiv)>
+{arxiv}
+</Academic Findings (arXiv)>
+
+<Industry Examples (Web)>
+{web}
+</Industry Examples (Web)>
+
+<Industry Examples (YouTube)>
+{youtube}
+</Industry Examples (YouTube)>
+"""
+
+LAYOUTS = {"baseline": BASELINE, "shipped": summarizer_context, "summary-first": SUMMARY_FIRST}
+MEMORY_CONFIG = {"configurable": {"memory_top_k": 5, "memory_max_chunks": 20}}
+WORDS = "model data latency cache token prefix memory source summary loop query result".split()
+
+
+def text(rng: random.Random, words: int) -> str:
+    """Return ``words`` random filler words."""
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def simulate(loops: int, seed: int = 0) -> list[dict]:
+    """Return per-loop prompt fields for a synthetic run."""
+    rng = random.Random(seed)
+    # Pinecone returns the top chunks of a shared pool for each loop's query
+    pool = [text(rng, 100) for _ in range(60)]
+    relevance = [rng.random() for _ in pool]
+
+    def recall(query, top_k, config, namespace=""):
+        scored = [(chunk, score * rng.uniform(0.8, 1.2)) for chunk, score in zip(pool, relevance)]
+        return sorted(scored, key=lambda item: -item[1])[:top_k * 3][::3][:top_k]
+
+    graph_module.cached_semantic_recall = recall
+    memory = SummaryState(research_topic="KV cache reuse in local LLM serving", search_query="q")
+    summary = ""
+    states = []
+    for _ in range(loops):
+        update = graph_module.recall_memory(memory, MEMORY_CONFIG)
+        memory.memory, memory.memory_scores = update["memory"], update["memory_scores"]
+        states.append({
+            "research_topic": memory.research_topic,
+            "memory": "\n".join(memory.memory),
+            "existing_summary": summary,
+            "wikipedia": text(rng, 300),
+            "arxiv": text(rng, 300),
+            "web": text(rng, 600),
+            "youtube": text(rng, 300),
+        })
+        # The LLM extends the summary, usually editing its opening section too
+        paragraphs = summary.split("\n\n") if summary else []
+        if paragraphs:
+            paragraphs[0] += " " + text(rng, 20)
+        summary = "\n\n".join(paragraphs + [text(rng, 120)])
+    return states
+
+
+def common_prefix(a: str, b: str) -> int:
+    """Return the length of the common prefix of two prompts."""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def offline(loops: int) -> None:
+    """Print how much of each loop's prompt a prefix cache could serve, per layout."""
+    states = simulate(loops)
+    totals = {}
+    for name, template in LAYOUTS.items():
+        prompts = [summarizer_instructions + template.format(**s) for s in states]
+        print(f"\n{name} layout (~tokens at 4 chars/token)")
+        print(f"{'loop':>4} {'prompt':>8} {'cached':>8} {'prefill':>8}")
+        total_prefill = 0
+        for i, prompt in enumerate(prompts):
+            cached = common_prefix(prompts[i - 1], prompt) if i else len(summarizer_instructions)
+            prefill = len(prompt) - cached
+            total_prefill += prefill
+            print(f"{i + 1:>4} {len(prompt) // 4:>8} {cached // 4:>8} {prefill // 4:>8}")
+        print(f"total prefill: ~{total_prefill // 4} tokens")
+        totals[name] = total_prefill
+
+    print()
+    for name, total in totals.items():
+        change = (total - totals["baseline"]) / totals["baseline"]
+        print(f"{name:<14} prefill ~{total // 4:>6} tokens ({change:+.1%} vs baseline)")
+
+
+def live(url: str, model: str, loops: int, num_ctx: int) -> None:
+    """Run the loops against an Ollama server and print its prefill timings."""
+    import requests
+
+    summary = ""
+    for i, state in enumerate(simulate(loops)):
+        state["existing_summary"] = summary
+        resp = requests.post(f"{url}/api/chat", json={
+            "model": model,
+            "stream": False,
+            "keep_alive": "30m",
+            "options": {"temperature": 0, "num_ctx": num_ctx},
+            "messages": [
+                {"role": "system", "content": summarizer_instructions},
+                {"role": "user", "content": summarizer_context.format(**state)},
+            ],
+        }, timeout=600)
+        resp.raise_for_status()
+        data = resp.json()
+        summary = data["message"]["content"]
+        print(f"loop {i + 1}: prompt_eval_count={data.get('prompt_eval_count')} "
+              f"prompt_eval_duration={data.get('prompt_eval_duration', 0) / 1e9:.2f}s")
+
+
+def main() -> None:
+    """Run the offline comparison, and the live one when --ollama is given."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loops", type=int, default=8)
+    parser.add_argument("--ollama", default=None, help="Ollama base URL for a live run")
+    parser.add_argument("--model", default=os.getenv("LOCAL_LLM", "llama3.2"))
+    parser.add_argument("--num-ctx", type=int, default=16384)
+    args = parser.parse_args()
+
+    offline(args.loops)
+    if args.ollama:
+        print(f"\nlive run against {args.ollama} ({args.model})")
+        live(args.ollama, args.model, args.loops, args.num_ctx)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Local archive of finished research reports for topic-level reuse.
+
+finalize_summary stores each report with its sources, timings and an
+embedding of the topic in SQLite, indexed with FTS5. Before researching, a
+run looks for a close match: a near-identical, recent topic is answered
+straight from the archive; a similar but older one seeds running_summary
+so the run only needs a single refresh loop.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    report TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    timings TEXT NOT NULL,
+    embedding TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts
+USING fts5(topic, summary, content='reports', content_rowid='id');
+"""
+
+CANDIDATES = 20  # full-text matches re-ranked by similarity
+RECENT_SCAN = 200  # recent reports compared when full-text finds nothing
+
+_initialized: dict[str, bool] = {}
+_init_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ArchivedReport:
+    """A stored report and how close it is to the topic being looked up."""
+
+    topic: str
+    summary: str
+    report: str
+    sources: list
+    similarity: float
+    age_hours: float
+
+
+def _tokens(text: str) -> set[str]:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def similarity(topic: str, embedding: Optional[list[float]],
+               other_topic: str, other_embedding: Optional[list[float]]) -> float:
+    """Cosine similarity of topic embeddings, or token overlap when one is missing."""
+    if embedding and other_embedding and len(embedding) == len(other_embedding):
+        return _cosine(embedding, other_embedding)
+    a, b = _tokens(topic), _tokens(other_topic)
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+
+class ResearchArchive:
+    """SQLite store of finished reports with full-text and embedding lookup."""
+
+    def __init__(self, path: str):
+        """Open the archive at ``path``, creating its tables on first use."""
+        self.path = os.path.expanduser(path)
+        with _init_lock:
+            if self.path not in _initialized:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with self._connect() as conn:
+                    conn.executescript(_SCHEMA)
+                    try:
+                        conn.executescript(_FTS_SCHEMA)
+                        fts = True
+                    except sqlite3.OperationalError:
+                        fts = False  # SQLite built without FTS5: similarity scan only
+                _initialized[self.path] = fts
+        self.fts = _initialized[self.path]
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, topic: str, summary: str, report: str, sources: list,
+            timings: dict, embedding: Optional[list[float]] = None) -> None:
+        """Store a finished report."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO reports (topic, summary, report, sources, timings, embedding, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (topic, summary, report, json.dumps(sources), json.dumps(timings),
+                 json.dumps(embedding) if embedding else None, time.time()),
+            )
+            if self.fts:
+                conn.execute(
+                    "INSERT INTO reports_fts (rowid, topic, summary) VALUES (?, ?, ?)",
+                    (cur.lastrowid, topic, summary),
+                )
+
+    def lookup(self, topic: str, embedding: Optional[list[float]] = None,
+               max_age_hours: Optional[float] = None) -> Optional[ArchivedReport]:
+        """Return the most similar archived report no older than ``max_age_hours``."""
+        columns = "r.topic, r.summary, r.report, r.sources, r.embedding, r.created_at"
+        oldest = time.time() - max_age_hours * 3600 if max_age_hours else 0.0
+        rows = []
+        with self._connect() as conn:
+            terms = " OR ".join(f'"{t}"' for t in sorted(_tokens(topic)))
+            if self.fts and terms:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid "
+                    "WHERE reports_fts MATCH ? AND r.created_at >= ? ORDER BY bm25(reports_fts) LIMIT ?",
+                    (f"topic : ({terms})", oldest, CANDIDATES),
+                ).fetchall()
+            if not rows:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM reports r WHERE r.created_at >= ? "
+                    "ORDER BY r.created_at DESC LIMIT ?",
+                    (oldest, RECENT_SCAN),
+                ).fetchall()
+
+        best = None
+        for other_topic, summary, report, sources, other_embedding, created_at in rows:
+            score = similarity(
+                topic, embedding, other_topic, json.loads(other_embedding) if other_embedding else None
+            )
+            if best is None or score > best.similarity:
+                best = ArchivedReport(
+                    topic=other_topic,
+                    summary=summary,
+                    report=report,
+                    sources=json.loads(sources),
+                    similarity=score,
+                    age_hours=(time.time() - created_at) / 3600,
+                )
+        return best
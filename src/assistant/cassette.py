@@ -0,0 +1,302 @@
+"""Record/replay of a research run's external I/O.
+
+In record mode every HTTP request made through ``requests`` (Tavily,
+Perplexity, YouTube, Wikipedia, arXiv, Discord), every LLM call made
+through invoke_llm() and every Pinecone call is captured, with its timing,
+into a compact gzipped JSON-lines cassette. In replay mode the same calls
+are answered from the cassette, sleeping for the original duration times
+``scale`` (0 replays instantly). Slow production runs can then be
+reproduced offline to profile CPU hot spots or to compare versions.
+
+    python -m assistant.cassette record run.cassette.gz "my topic"
+    python -m assistant.cassette replay run.cassette.gz --scale 0 --profile run.pstats
+
+Calls are matched on a hash of the request. When a request changed (e.g.
+a new prompt layout) replay falls back to the next unused recording on the
+same channel (HTTP host, LLM node or Pinecone operation), in call order.
+Secrets are never written: requests are stored only as hashes and secret
+configuration values are redacted in the cassette header.
+"""
+
+import argparse
+import base64
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import fields
+from typing import Any, Callable, Optional
+from urllib.parse import urlsplit
+
+from assistant.configuration import Configuration
+
+FORMAT_VERSION = 1
+SECRET_MARKERS = ("key", "password", "username", "recipient", "webhook")
+
+_active: Optional["Cassette"] = None
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a call has no recording."""
+
+
+def request_key(*parts: Any) -> str:
+    """Stable short hash identifying a request."""
+    blob = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:24]
+
+
+class Cassette:
+    """Recorded interactions of one run, keyed by channel and request hash."""
+
+    def __init__(self, path: str, mode: str, scale: float = 1.0):
+        """Start an empty recording, or load ``path`` to replay it."""
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.scale = scale
+        self.header: dict[str, Any] = {}
+        self.records: list[dict[str, Any]] = []
+        self._used: set[int] = set()
+        self._lock = threading.Lock()
+        self._started = time.time()
+        if mode == "replay":
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self.header = json.loads(f.readline())
+                self.records = [json.loads(line) for line in f]
+
+    def save(self) -> None:
+        """Write the header and recordings to the cassette file."""
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"version": FORMAT_VERSION, **self.header}) + "\n")
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+    def _take(self, channel: str, key: str) -> Optional[dict[str, Any]]:
+        """Claim the recording for a call: exact match first, else next on the channel."""
+        with self._lock:
+            fallback = None
+            for i, record in enumerate(self.records):
+                if i in self._used or record["channel"] != channel:
+                    continue
+                if record["key"] == key:
+                    self._used.add(i)
+                    return record
+                if fallback is None:
+                    fallback = i
+            if fallback is None:
+                return None
+            self._used.add(fallback)
+            return self.records[fallback]
+
+    def intercept(self, channel: str, key: str, call: Callable[[], Any],
+                  encode: Callable = lambda value: value,
+                  decode: Callable = lambda value: value,
+                  optional: bool = False) -> Any:
+        """Run ``call`` and record it, or answer it from the cassette."""
+        if self.mode == "replay":
+            record = self._take(channel, key)
+            if record is None:
+                if optional:
+                    return None
+                raise CassetteMiss(f"No recording left for {channel}")
+            if self.scale:
+                time.sleep(record["elapsed"] * self.scale)
+            return decode(record["response"])
+
+        start = time.time()
+        value = call()
+        record = {
+            "channel": channel,
+            "key": key,
+            "offset": start - self._started,
+            "elapsed": time.time() - start,
+            "response": encode(value),
+        }
+        with self._lock:
+            self.records.append(record)
+        return value
+
+
+def intercept(channel: str, key: str, call: Callable[[], Any], **kwargs) -> Any:
+    """Route an external call through the active cassette, if there is one."""
+    if _active is None:
+        return call()
+    return _active.intercept(channel, key, call, **kwargs)
+
+
+def _encode_response(resp) -> dict[str, Any]:
+    return {
+        "status": resp.status_code,
+        "url": resp.url,
+        "headers": dict(resp.headers),
+        "encoding": resp.encoding,
+        "body": base64.b64encode(resp.content).decode("ascii"),
+    }
+
+
+def _decode_response(data: dict[str, Any]):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    resp = requests.Response()
+    resp.status_code = data["status"]
+    resp.url = data["url"]
+    resp.headers = CaseInsensitiveDict(data["headers"])
+    resp.encoding = data["encoding"]
+    resp._content = base64.b64decode(data["body"])
+    resp._content_consumed = True
+    return resp
+
+
+class _NullSMTP:
+    """Stands in for smtplib.SMTP during replay so no email is sent."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: {}
+
+
+@contextlib.contextmanager
+def _recorded_config_env():
+    """Hide configuration environment variables, which would override the header."""
+    names = [f.name.upper() for f in fields(Configuration) if f.init]
+    saved = {name: os.environ.pop(name) for name in names if name in os.environ}
+    # The Tavily client insists on a key even though replayed calls never leave
+    os.environ["TAVILY_API_KEY"] = "redacted"
+    try:
+        yield
+    finally:
+        os.environ.pop("TAVILY_API_KEY", None)
+        os.environ.update(saved)
+
+
+@contextlib.contextmanager
+def use_cassette(path: str, mode: str = "replay", scale: float = 1.0,
+                 header: Optional[dict[str, Any]] = None):
+    """Record or replay all external I/O made inside the block."""
+    global _active
+    import smtplib
+
+    import requests
+
+    import assistant.graph as graph_module
+
+    cassette = Cassette(path, mode, scale=scale)
+    if header:
+        cassette.header.update(header)
+    original_request = requests.Session.request
+    original_smtp = smtplib.SMTP
+    original_discord = graph_module.send_discord_message
+
+    def request(session, method, url, *args, **kwargs):
+        key = request_key(method, url, kwargs.get("params"), kwargs.get("data"), kwargs.get("json"))
+        return cassette.intercept(
+            f"http:{urlsplit(url).netloc}",
+            key,
+            lambda: original_request(session, method, url, *args, **kwargs),
+            encode=_encode_response,
+            decode=_decode_response,
+        )
+
+    requests.Session.request = request
+    if mode == "replay":
+        smtplib.SMTP = _NullSMTP
+        graph_module.send_discord_message = lambda content: {}
+    _active = cassette
+    try:
+        yield cassette
+    finally:
+        _active = None
+        requests.Session.request = original_request
+        smtplib.SMTP = original_smtp
+        graph_module.send_discord_message = original_discord
+        if mode == "record":
+            cassette.save()
+
+
+def redacted_config(configurable: Configuration) -> dict[str, Any]:
+    """Return the configuration values that are safe to store in a cassette header."""
+    values = {}
+    for name, value in vars(configurable).items():
+        if hasattr(value, "value"):  # Enum
+            value = value.value
+        if value and any(marker in name for marker in SECRET_MARKERS):
+            parts = urlsplit(str(value))
+            # Keep the host of secret URLs so replayed requests match their channel
+            value = f"{parts.scheme}://{parts.netloc}/redacted" if parts.netloc else "redacted"
+        values[name] = value
+    return values
+
+
+def main() -> None:
+    """Record or replay a run from the command line."""
+    parser = argparse.ArgumentParser(description="Record or replay a research run.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record = sub.add_parser("record", help="run the graph live and record its I/O")
+    record.add_argument("path")
+    record.add_argument("topic")
+    replay = sub.add_parser("replay", help="re-run the graph against a recording")
+    replay.add_argument("path")
+    replay.add_argument("--scale", type=float, default=1.0,
+                        help="multiply recorded latencies (0 = no waiting)")
+    replay.add_argument("--profile", default=None, help="write cProfile stats to this file")
+    args = parser.parse_args()
+
+    from assistant.graph import build_graph
+
+    if args.command == "record":
+        configurable = Configuration.from_runnable_config()
+        header = {"topic": args.topic, "configurable": redacted_config(configurable)}
+        started = time.time()
+        with use_cassette(args.path, "record", header=header) as cassette:
+            build_graph(configurable).invoke({"research_topic": args.topic})
+        print(f"recorded {len(cassette.records)} calls in {time.time() - started:.1f}s to {args.path}")
+        return
+
+    import tempfile
+
+    # Replays run with the recorded configuration, not this machine's environment
+    with _recorded_config_env(), tempfile.TemporaryDirectory() as tmp, \
+            use_cassette(args.path, "replay", scale=args.scale) as cassette:
+        # Replays must not touch the real local memory index or archive
+        values = dict(cassette.header["configurable"],
+                      memory_index_path=f"{tmp}/memory_index.sqlite")
+        if values.get("research_archive_path"):
+            values["research_archive_path"] = f"{tmp}/archive.sqlite"
+        config = {"configurable": values}
+        graph = build_graph(Configuration.from_runnable_config(config))
+        profiler = None
+        if args.profile:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.time()
+        try:
+            graph.invoke({"research_topic": cassette.header["topic"]}, config)
+        finally:
+            # Keep the profile of a replay that failed part-way, e.g. on a CassetteMiss
+            elapsed = time.time() - started
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(args.profile)
+        unused = len(cassette.records) - len(cassette._used)
+        print(f"replayed {len(cassette._used)} calls in {elapsed:.1f}s "
+              f"(scale {args.scale:g}, {unused} recordings unused)")
+
+
+if __name__ == "__main__":
+    main()
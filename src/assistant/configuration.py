@@ -1,9 +1,9 @@
 import os
 from dataclasses import dataclass, fields
-from typing import Any, Optional
+from typing import Any, Optional, Union, get_args, get_origin
+from urllib.parse import urlsplit
 
 from langchain_core.runnables import RunnableConfig
-from dataclasses import dataclass
 
 from enum import Enum
 
@@ -13,6 +13,39 @@ class SearchAPI(Enum):
     TAVILY = "tavily"
 
 
+def _coerce(field_type: Any, value: Any) -> Any:
+    """Convert env/Studio string values to the declared scalar field type."""
+    if not isinstance(value, str):
+        return value
+    if get_origin(field_type) is Union:
+        # Optional[X] -> X
+        args = [a for a in get_args(field_type) if a is not type(None)]
+        field_type = args[0] if len(args) == 1 else str
+    if field_type is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if field_type in (int, float):
+        return field_type(value)
+    return value
+
+
+def _ollama_host_url(host: str) -> str:
+    """Turn an OLLAMA_HOST value (e.g. ``myhost`` or ``myhost:8080``) into a base URL.
+
+    Mirrors the ollama client: a bare host gets http and port 11434.
+    """
+    scheme, sep, rest = host.strip().partition("://")
+    if sep:
+        default_port = {"http": 80, "https": 443}.get(scheme, 11434)
+    else:
+        scheme, rest, default_port = "http", host.strip(), 11434
+    parts = urlsplit(f"{scheme}://{rest}")
+    hostname = parts.hostname or "127.0.0.1"
+    if ":" in hostname:  # IPv6
+        hostname = f"[{hostname}]"
+    path = parts.path.strip("/")
+    return f"{scheme}://{hostname}:{parts.port or default_port}" + (f"/{path}" if path else "")
+
+
 @dataclass(kw_only=True)
 class Configuration:
     """The configurable fields for the research assistant."""
@@ -21,27 +54,86 @@ class Configuration:
     local_llm: str = "llama3.2"
     search_api: SearchAPI = SearchAPI.TAVILY  # Default to TAVILY
 
-
-
-
-
-
-    # New configuration for YouTube and Email
-    youtube_api_key: Optional[str] = os.getenv("YOUTUBE_API_KEY")
-    email_recipient: Optional[str] = os.getenv("EMAIL_RECIPIENT")
+    # Ranked web queries asked for in each query/reflection call and searched
+    # concurrently, so one loop covers what several single-query loops would
+    queries_per_loop: int = 1
+
+    # Comma-separated Ollama hosts; calls are balanced across them by load and
+    # health, and a run stays on one host while it can (see llm.py). Unset,
+    # it is OLLAMA_HOST when that is set, as for the plain ollama client.
+    ollama_base_urls: str = "http://localhost:11434"
+
+    # Model tiers: a small model for the JSON query/reflection calls and a
+    # large one for summarization. Both fall back to local_llm.
+    query_llm: Optional[str] = None
+    summarizer_llm: Optional[str] = None
+    embedding_model: str = "nomic-embed-text"  # topic embeddings for the research archive
+
+    # Ollama context options, shared by every call in a run so the loaded
+    # model and its prompt cache are re-used between loops and sessions
+    ollama_num_ctx: Optional[int] = None
+    ollama_keep_alive: str = "30m"
+
+    # Requests each Ollama host serves at once (its OLLAMA_NUM_PARALLEL);
+    # the job queue starts this many workers per host by default
+    ollama_num_parallel: int = 4
+
+    # Comma-separated research sources to wire into the graph. Each one is a
+    # provider plug-in (see providers.py) imported only when it is enabled.
+    research_sources: str = "web,youtube,wikipedia,arxiv"
+
+    # Split the topic into this many aspects, each researched by its own
+    # loop in parallel and merged into one summary (1 = a single loop)
+    research_aspects: int = 1
+
+    # Local archive of finished reports (disabled when unset). A new topic
+    # matching an archived one at archive_reuse_similarity or more, within
+    # archive_reuse_max_age_hours, returns the archived report; a match at
+    # archive_refresh_similarity within archive_refresh_max_age_hours seeds
+    # the summary and runs a single refresh loop.
+    research_archive_path: Optional[str] = None
+    archive_reuse_similarity: float = 0.95
+    archive_reuse_max_age_hours: float = 24
+    archive_refresh_similarity: float = 0.85
+    archive_refresh_max_age_hours: float = 168
+
+    # Wall-clock budget per run. As it runs out the run skips YouTube, asks
+    # for fewer results, skips reflection and finally finalizes early.
+    run_budget_seconds: Optional[float] = None
+
+    # Write per-node cProfile stats and tracemalloc snapshots for every run
+    # under this directory (disabled when unset); see profiling.py
+    profile_dir: Optional[str] = None
+
+    # Pinecone recall runs every loop; recalled chunks are merged and capped
+    memory_top_k: int = 5
+    memory_max_chunks: int = 20
+
+    # Memory records are content-addressed and namespaced per topic, or per
+    # tenant when memory_namespace is set. The local index lets duplicate
+    # chunks skip the embed + upsert round trip; compaction expires records
+    # not seen for memory_ttl_days, and chunks stored longer ago are written again.
+    memory_namespace: Optional[str] = None
+    memory_index_path: str = "~/.cache/ollama-deep-researcher/memory_index.sqlite"
+    memory_ttl_days: float = 30
+
+    # Secrets and endpoints. These default to None and are resolved from the
+    # environment in from_runnable_config(), not at import time.
+    youtube_api_key: Optional[str] = None
+    email_recipient: Optional[str] = None
     smtp_server: Optional[str] = 'smtp.gmail.com'
     smtp_port: Optional[int] = 587
-    smtp_username: Optional[str] = os.getenv("SMTP_USERNAME")
-    smtp_password: Optional[str] = os.getenv("SMTP_PASSWORD")
-    tavily_api_key: Optional[str] = os.getenv("TAVILY_API_KEY")
-    discord_webhook_url: Optional[str] = os.getenv("DISCORD_WEBHOOK_URL")
-    pinecone_api_key: Optional[str] = os.getenv("PINECONE_API_KEY")
-    pinecone_environment: Optional[str] = os.getenv("PINECONE_ENVIRONMENT")
-    pinecone_index_name: Optional[str] = os.getenv("PINECONE_INDEX_NAME")
-
-
-
-
+    smtp_username: Optional[str] = None
+    smtp_password: Optional[str] = None
+    tavily_api_key: Optional[str] = None
+    discord_webhook_url: Optional[str] = None
+    pinecone_api_key: Optional[str] = None
+    pinecone_environment: Optional[str] = None
+    pinecone_index_name: Optional[str] = None
+
+    def enabled_sources(self) -> list[str]:
+        """Return the requested research sources, in pipeline order."""
+        return [s.strip() for s in self.research_sources.split(",") if s.strip()]
 
     @classmethod
     def from_runnable_config(
@@ -52,8 +144,10 @@ class Configuration:
             config["configurable"] if config and "configurable" in config else {}
         )
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
+            f.name: _coerce(f.type, os.environ.get(f.name.upper(), configurable.get(f.name)))
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
\ No newline at end of file
+        if not values["ollama_base_urls"] and os.environ.get("OLLAMA_HOST"):
+            values["ollama_base_urls"] = _ollama_host_url(os.environ["OLLAMA_HOST"])
+        return cls(**{k: v for k, v in values.items() if v is not None and v != ""})
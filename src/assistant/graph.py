@@ -1,113 +1,303 @@
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from typing_extensions import Literal
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-from langchain_ollama import ChatOllama
 from langgraph.graph import START, END, StateGraph
+from langgraph.types import Send
 from email.mime.text import MIMEText
 from email.header import Header
 
-from assistant.configuration import Configuration, SearchAPI
+from assistant.configuration import Configuration
+from assistant.archive import ResearchArchive
+from assistant.llm import embed_text, invoke_llm
+from assistant.memory_index import memory_namespace
+from assistant.profiling import profiled
+from assistant.scheduler import (
+    DeadlineExceeded,
+    call_with_deadline,
+    degradation,
+    new_deadline,
+    remaining,
+)
+from assistant.providers import (
+    PROVIDERS,
+    is_enabled,
+    load_provider,
+    memory_enabled,
+    requested_sources,
+    resolve_source,
+)
 from assistant.utils import (
     deduplicate_and_format_sources,
-    tavily_search,
     format_sources,
-    perplexity_search,
-    youtube_search,  # new import for YouTube search
-    fetch_wikipedia, 
-    fetch_arxiv, 
     send_discord_message,
-    semantic_recall,
+    cached_semantic_recall,
     upsert_to_pinecone
 )
 from assistant.state import SummaryState, SummaryStateInput, SummaryStateOutput
 from assistant.prompts import (
+    aspect_merge_instructions,
+    aspect_planner_instructions,
+    multi_query_instructions,
     query_writer_instructions,
     summarizer_instructions,
+    summarizer_context,
     reflection_instructions,
 )
 
 
+def _degradation(state: SummaryState, configurable: Configuration):
+    """Return how far this run should degrade given its remaining budget."""
+    return degradation(
+        state.deadline,
+        configurable,
+        started=state.timings.get('start'),
+        loops_done=state.research_loop_count,
+    )
+
+
+def _strip_think(text: str) -> str:
+    """Remove any <think>...</think> blocks a reasoning model emitted."""
+    while "<think>" in text and "</think>" in text:
+        start = text.find("<think>")
+        end = text.find("</think>") + len("</think>")
+        text = text[:start] + text[end:]
+    return text
+
+
+def _ranked_queries(primary: str, extra, count: int) -> list[str]:
+    """Return the primary query followed by distinct extra ones, ``count`` at most."""
+    queries = [primary]
+    for query in extra if isinstance(extra, list) else []:
+        if isinstance(query, str) and query.strip() and query.strip() not in queries:
+            queries.append(query.strip())
+    return queries[:max(1, count)]
+
+
+def _with_multi_query(content: str, configurable: Configuration, key: str, primary_key: str) -> str:
+    """Ask for ``queries_per_loop`` ranked queries in the same call, if above 1."""
+    if configurable.queries_per_loop <= 1:
+        return content
+    return content + multi_query_instructions.format(
+        key=key, primary_key=primary_key, count=configurable.queries_per_loop
+    )
+
+
+def _focus(state: SummaryState) -> str:
+    """Return the topic this loop researches: the run's topic, narrowed to its aspect if any."""
+    return f"{state.research_topic} ({state.aspect})" if state.aspect else state.research_topic
+
+
+def _remember(source: str, text: str, state: SummaryState, configurable: Configuration):
+    """Persist a formatted source block to Pinecone memory when it is configured."""
+    if not memory_enabled(configurable):
+        return
+    try:
+        call_with_deadline(
+            upsert_to_pinecone,
+            source=source,
+            text=text,
+            topic=state.research_topic,
+            config=configurable,
+            deadline=state.deadline,
+        )
+    except DeadlineExceeded:
+        pass  # the answer matters more than persisting this chunk
+
+
 # Nodes
+def plan_aspects(state: SummaryState, config: RunnableConfig):
+    """Split the topic into aspects to research in parallel."""
+    # The run's timer and deadline, started by lookup_archive and shared by all branches
+    started = time.time()
+    configurable = Configuration.from_runnable_config(config)
+    deadline = state.deadline or new_deadline(configurable)
+    timings = {"start": state.timings.get("start", started)}
+
+    # A summary seeded from the archive is refreshed as a whole
+    if state.running_summary or configurable.research_aspects <= 1:
+        return {"aspects": [], "deadline": deadline, "timings": timings}
+
+    try:
+        result = invoke_llm(
+            configurable,
+            "plan_aspects",
+            [
+                SystemMessage(content=aspect_planner_instructions.format(
+                    research_topic=state.research_topic,
+                    max_aspects=configurable.research_aspects,
+                )),
+                HumanMessage(content="Break the topic into aspects:"),
+            ],
+            deadline=deadline,
+            session=state.research_topic,
+            temperature=0,
+            format="json",
+        )
+        parsed = json.loads(result.content)
+    except (DeadlineExceeded, ValueError):
+        parsed = None
+    planned = parsed.get("aspects") if isinstance(parsed, dict) else None
+    if not isinstance(planned, list):
+        # No usable plan: research the topic as a single aspect
+        planned = []
+
+    aspects = [
+        aspect.strip()
+        for aspect in planned
+        if isinstance(aspect, str) and aspect.strip()
+    ][:configurable.research_aspects]
+    timings["plan_aspects"] = time.time() - started
+    return {
+        "aspects": aspects,
+        "deadline": deadline,
+        "timings": timings,
+    }
+
+
+def fan_out_aspects(state: SummaryState):
+    """Start one research branch per planned aspect (one for the whole topic if none)."""
+    return [
+        Send("research_aspect", {
+            "research_topic": state.research_topic,
+            "aspect": aspect,
+            "running_summary": state.running_summary,
+            "deadline": state.deadline,
+            "loop_budget": state.loop_budget,
+            "timings": {"start": state.timings["start"]},
+        })
+        for aspect in state.aspects or [None]
+    ]
+
+
 def generate_query(state: SummaryState, config: RunnableConfig):
     """Generate a query for web search"""
     
-    # start overall research timer
-    state.timings['start'] = time.time()
+    # start overall research timer and the run's deadline, if it has a budget;
+    # an aspect branch inherits both from plan_aspects
+    started = state.timings.get("start", time.time())
+    configurable = Configuration.from_runnable_config(config)
+    deadline = state.deadline or new_deadline(configurable)
 
     # Format the prompt
     query_writer_instructions_formatted = query_writer_instructions.format(
-        research_topic=state.research_topic
+        research_topic=_focus(state)
     )
 
     # Generate a query
-    configurable = Configuration.from_runnable_config(config)
-    llm_json_mode = ChatOllama(
-        model=configurable.local_llm, temperature=0, format="json"
-    )
-    result = llm_json_mode.invoke(
-        [
-            SystemMessage(content=query_writer_instructions_formatted),
-            HumanMessage(content=f"Generate a query for web search:"),
-        ]
-    )
+    try:
+        result = invoke_llm(
+            configurable,
+            "generate_query",
+            [
+                SystemMessage(content=query_writer_instructions_formatted),
+                HumanMessage(content=_with_multi_query(
+                    "Generate a query for web search:", configurable, "queries", "query"
+                )),
+            ],
+            deadline=deadline,
+            session=_focus(state),
+            temperature=0,
+            format="json",
+        )
+    except DeadlineExceeded:
+        # Out of time already: search for the topic itself
+        return {
+            "search_query": _focus(state),
+            "search_queries": [_focus(state)],
+            "deadline": deadline,
+            "timings": {"start": started},
+        }
     query = json.loads(result.content)
 
-    return {"search_query": query["query"]}
+    return {
+        "search_query": query["query"],
+        "search_queries": _ranked_queries(
+            query["query"], query.get("queries"), configurable.queries_per_loop
+        ),
+        "deadline": deadline,
+        "timings": {"start": started},
+    }
+
+
+def _no_results(source: str) -> dict:
+    """Return the update of a source that found nothing this loop (skipped or timed out).
+
+    The empty block replaces the previous loop's one in the results window,
+    so summarize_sources doesn't summarize those results again.
+    """
+    return {f"{source}_research_results": [""]}
 
 
 def web_research(state: SummaryState, config: RunnableConfig):
-    """Gather information from the web"""
-    
+    """Gather information from the web for this loop's queries."""
     start = time.time()
     
     # Configure
     configurable = Configuration.from_runnable_config(config)
-
-    # Handle both cases for search_api:
-    # 1. When selected in Studio UI -> returns a string (e.g. "tavily")
-    # 2. When using default -> returns an Enum (e.g. SearchAPI.TAVILY)
-    if isinstance(configurable.search_api, str):
-        search_api = configurable.search_api
-    else:
-        search_api = configurable.search_api.value
-
-    # Search the web
-    if search_api == "tavily":
-        search_results = tavily_search(
-            state.search_query, include_raw_content=True, max_results=1
-        )
-        search_str = deduplicate_and_format_sources(
-            search_results, max_tokens_per_source=1000, include_raw_content=True
-        )
-    elif search_api == "perplexity":
-        search_results = perplexity_search(
-            state.search_query, state.research_loop_count
-        )
-        search_str = deduplicate_and_format_sources(
-            search_results, max_tokens_per_source=1000, include_raw_content=False
-        )
-    else:
+    search_api = resolve_source("web", configurable)
+    if not is_enabled(search_api, configurable):
+        return _no_results("web")
+    if search_api not in ("tavily", "perplexity"):
         raise ValueError(f"Unsupported search API: {configurable.search_api}")
 
-    state.web_research_results.append(search_str)
-    state.sources_gathered.append(format_sources(search_results))
+    def search(query: str):
+        # The HTTP call itself must end by the deadline, not just our wait for it
+        timeout = {"timeout": max(remaining(state.deadline), 1.0)} if state.deadline else {}
+        if search_api == "tavily":
+            return call_with_deadline(
+                load_provider("tavily"),
+                query, include_raw_content=True, max_results=1, **timeout,
+                deadline=state.deadline,
+            )
+        return call_with_deadline(
+            load_provider("perplexity"),
+            query, state.research_loop_count, **timeout,
+            deadline=state.deadline,
+        )
 
-    # record web step duration
-    state.timings['web_research'] = time.time() - start
-    
-    upsert_to_pinecone(
-        source_id=f"web_{state.research_loop_count}",
-        text=search_str,
-        topic=state.research_topic,
-        config=Configuration.from_runnable_config(config),
+    # Search the web, running the loop's ranked queries concurrently
+    queries = state.search_queries or [state.search_query]
+    responses = []
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        futures = [pool.submit(search, query) for query in queries]
+        for rank, future in enumerate(futures):
+            try:
+                responses.append(future.result())
+            except DeadlineExceeded:
+                pass
+            except Exception:
+                # A lower-ranked query that fails (HTTP error, rate limit) only
+                # loses its extra results; the primary query's errors propagate
+                if rank == 0:
+                    raise
+    if not responses:
+        return _no_results("web")
+
+    # One response for all queries, first result per URL in query rank order
+    merged = {}
+    for response in responses:
+        for result in response["results"]:
+            merged.setdefault(result["url"], result)
+    search_results = {"results": list(merged.values())}
+
+    search_str = deduplicate_and_format_sources(
+        search_results,
+        max_tokens_per_source=1000,
+        include_raw_content=search_api == "tavily",
     )
 
+    _remember("web", search_str, state, configurable)
+
+    # Return only this loop's results; the state reducers merge them
     return {
-        "web_research_results": state.web_research_results,
-        "research_loop_count": state.research_loop_count + 1,
+        "web_research_results": [search_str],
+        "sources_gathered": [format_sources(search_results)],
+        "timings": {"web_research": time.time() - start},
     }
 
 
@@ -117,81 +307,93 @@ def youtube_research(state: SummaryState, config: RunnableConfig):
     start = time.time()
 
     configurable = Configuration.from_runnable_config(config)
-    if not configurable.youtube_api_key:
-        raise ValueError("YouTube API key not configured in Configuration.")
-
-    youtube_results = youtube_search(
-        state.search_query, configurable.youtube_api_key, max_results=3
-    )
+    if not is_enabled("youtube", configurable):
+        # No API key (or disabled at runtime): skip instead of failing the run
+        return _no_results("youtube")
+    plan = _degradation(state, configurable)
+    if plan.skip_youtube:
+        # Transcripts are the slowest source; drop them first when time is short
+        return _no_results("youtube")
+
+    try:
+        youtube_results = call_with_deadline(
+            load_provider("youtube"),
+            state.search_query, configurable.youtube_api_key,
+            max_results=1 if plan.reduce_results else 3,
+            deadline=state.deadline,
+        )
+    except DeadlineExceeded:
+        return _no_results("youtube")
     youtube_str = deduplicate_and_format_sources(
         youtube_results, max_tokens_per_source=500, include_raw_content=True
     )
-    state.youtube_research_results.append(youtube_str)
-    state.sources_gathered.append(format_sources(youtube_results))
+    _remember("youtube", youtube_str, state, configurable)
 
-    # record YouTube step duration
-    state.timings['youtube_research'] = time.time() - start
-
-    upsert_to_pinecone(
-        source_id=f"yt_{state.research_loop_count}",
-        text=youtube_str,
-        topic=state.research_topic,
-        config=Configuration.from_runnable_config(config),
-    )
-
-    return {"youtube_research_results": state.youtube_research_results}
+    return {
+        "youtube_research_results": [youtube_str],
+        "sources_gathered": [format_sources(youtube_results)],
+        "timings": {"youtube_research": time.time() - start},
+    }
 
 
 def wikipedia_research(state: SummaryState, config: RunnableConfig):
     """Gather intro extracts from Wikipedia."""
     
     start = time.time()
-    
-    wiki_results = fetch_wikipedia(state.search_query, limit=3)
+    configurable = Configuration.from_runnable_config(config)
+    if not is_enabled("wikipedia", configurable):
+        return _no_results("wikipedia")
+
+    limit = 1 if _degradation(state, configurable).reduce_results else 3
+    try:
+        wiki_results = call_with_deadline(
+            load_provider("wikipedia"), state.search_query, limit=limit,
+            deadline=state.deadline,
+        )
+    except DeadlineExceeded:
+        return _no_results("wikipedia")
     wiki_str = deduplicate_and_format_sources(
         {"results": wiki_results},
         max_tokens_per_source=500,
         include_raw_content=True
     )
-    state.wikipedia_research_results.append(wiki_str)
-    state.sources_gathered.append(format_sources({"results": wiki_results}))
-
-    # record Wikipedia step duration
-    state.timings['wikipedia_research'] = time.time() - start
+    _remember("wikipedia", wiki_str, state, configurable)
 
-    upsert_to_pinecone(
-        source_id=f"wiki_{state.research_loop_count}",
-        text=wiki_str,
-        topic=state.research_topic,
-        config=Configuration.from_runnable_config(config),
-    )
-
-    return {"wikipedia_research_results": state.wikipedia_research_results}
+    return {
+        "wikipedia_research_results": [wiki_str],
+        "sources_gathered": [format_sources({"results": wiki_results})],
+        "timings": {"wikipedia_research": time.time() - start},
+    }
 
 
 
 def arxiv_research(state: SummaryState, config: RunnableConfig):
+    """Gather titles and abstracts from arXiv."""
     start = time.time()
-    arxiv_results = fetch_arxiv(state.search_query, max_results=3)
+    configurable = Configuration.from_runnable_config(config)
+    if not is_enabled("arxiv", configurable):
+        return _no_results("arxiv")
+
+    max_results = 1 if _degradation(state, configurable).reduce_results else 3
+    try:
+        arxiv_results = call_with_deadline(
+            load_provider("arxiv"), state.search_query, max_results=max_results,
+            deadline=state.deadline,
+        )
+    except DeadlineExceeded:
+        return _no_results("arxiv")
     arxiv_str = deduplicate_and_format_sources(
         {"results": arxiv_results},
         max_tokens_per_source=500,
         include_raw_content=True
     )
-    state.arxiv_research_results.append(arxiv_str)
-    state.sources_gathered.append(format_sources({"results": arxiv_results}))
-    
-    # record arXiv step duration
-    state.timings['arxiv_research'] = time.time() - start
-
-    upsert_to_pinecone(
-        source_id=f"arxiv_{state.research_loop_count}",
-        text=arxiv_str,
-        topic=state.research_topic,
-        config=Configuration.from_runnable_config(config),
-    )
-    
-    return {"arxiv_research_results": state.arxiv_research_results}
+    _remember("arxiv", arxiv_str, state, configurable)
+
+    return {
+        "arxiv_research_results": [arxiv_str],
+        "sources_gathered": [format_sources({"results": arxiv_results})],
+        "timings": {"arxiv_research": time.time() - start},
+    }
 
 
 
@@ -203,118 +405,238 @@ def summarize_sources(state: SummaryState, config: RunnableConfig):
     wiki_block         = state.wikipedia_research_results[-1] if state.wikipedia_research_results else ""
     arxiv_block        = state.arxiv_research_results[-1]    if state.arxiv_research_results    else ""
     web_block          = state.web_research_results[-1]      if state.web_research_results      else ""
-    youtube_block      = "\n".join(state.youtube_research_results) if state.youtube_research_results else ""
+    youtube_block      = state.youtube_research_results[-1]  if state.youtube_research_results  else ""
     memory_block     = "\n".join(state.memory)             if state.memory                  else ""
 
     start = time.time()
 
-    # Build a single labeled prompt for the LLM
-    human_message_content = f"""
-<User Input>
-{state.research_topic}
-</User Input>
+    # Build a single labeled prompt for the LLM, most stable blocks first
+    human_message_content = summarizer_context.format(
+        existing_summary=existing_summary,
+        research_topic=_focus(state),
+        memory=memory_block,
+        wikipedia=wiki_block,
+        arxiv=arxiv_block,
+        web=web_block,
+        youtube=youtube_block,
+    )
 
-<Memory>
-{memory_block}
-</Memory>
+    # Run the LLM to generate an updated summary
+    configurable = Configuration.from_runnable_config(config)
+    try:
+        result = invoke_llm(
+            configurable,
+            "summarize_sources",
+            [
+                SystemMessage(content=summarizer_instructions),
+                HumanMessage(content=human_message_content),
+            ],
+            deadline=state.deadline,
+            session=_focus(state),
+            temperature=0,
+        )
+    except DeadlineExceeded:
+        # Keep the best summary so far; route_research will finalize
+        return {"research_loop_count": state.research_loop_count + 1}
 
-<Existing Summary>
-{existing_summary}
-</Existing Summary>
+    running_summary = _strip_think(result.content)
+    timings = {}
 
-<Background (Wikipedia)>
-{wiki_block}
-</Background (Wikipedia)>
+    # Ollama reports prefill time; it drops when the prompt prefix is cached
+    prefill_ns = result.response_metadata.get("prompt_eval_duration")
+    if prefill_ns is not None:
+        timings['summarize_prefill'] = prefill_ns / 1e9
 
-<Academic Findings (arXiv)>
-{arxiv_block}
-</Academic Findings (arXiv)>
+    timings['summarize_sources'] = time.time() - start
 
-<Industry Examples (Web)>
-{web_block}
-</Industry Examples (Web)>
+    # One summarization pass completes a research loop, whichever sources ran
+    return {
+        "running_summary": running_summary,
+        "research_loop_count": state.research_loop_count + 1,
+        "timings": timings,
+    }
 
-<Industry Examples (YouTube)>
-{youtube_block}
-</Industry Examples (YouTube)>
-"""
 
-    # Run the LLM to generate an updated summary
-    configurable = Configuration.from_runnable_config(config)
-    llm = ChatOllama(model=configurable.local_llm, temperature=0)
-    result = llm.invoke(
-        [
-            SystemMessage(content=summarizer_instructions),
-            HumanMessage(content=human_message_content),
-        ]
-    )
+def reflect_on_summary(state: SummaryState, config: RunnableConfig):
+    """Reflect on the summary and generate follow-up queries"""
 
-    running_summary = result.content
+    fallback = f"Tell me more about {_focus(state)}"
+    configurable = Configuration.from_runnable_config(config)
+    plan = _degradation(state, configurable)
+    if plan.skip_reflection or plan.finalize:
+        # Not worth an LLM call this late in the budget
+        return {"search_query": fallback, "search_queries": [fallback]}
+
+    try:
+        result = invoke_llm(
+            configurable,
+            "reflect_on_summary",
+            [
+                SystemMessage(
+                    content=reflection_instructions.format(
+                        research_topic=_focus(state)
+                    )
+                ),
+                HumanMessage(
+                    content=_with_multi_query(
+                        f"Identify a knowledge gap and generate a follow-up web search query based on our existing knowledge: {state.running_summary}",
+                        configurable,
+                        "follow_up_queries",
+                        "follow_up_query",
+                    )
+                ),
+            ],
+            deadline=state.deadline,
+            session=_focus(state),
+            temperature=0,
+            format="json",
+        )
+    except DeadlineExceeded:
+        return {"search_query": fallback, "search_queries": [fallback]}
+    follow_up_query = json.loads(result.content)
 
-    # Remove any <think> tags if present
-    while "<think>" in running_summary and "</think>" in running_summary:
-        start = running_summary.find("<think>")
-        end = running_summary.find("</think>") + len("</think>")
-        running_summary = running_summary[:start] + running_summary[end:]
+    query = follow_up_query.get("follow_up_query")
+    if not query:
+        return {"search_query": fallback, "search_queries": [fallback]}
 
-    state.running_summary = running_summary
-    state.timings['summarize_sources'] = time.time() - start
-    
-    return {"running_summary": running_summary}
+    return {
+        "search_query": query,
+        "search_queries": _ranked_queries(
+            query, follow_up_query.get("follow_up_queries"), configurable.queries_per_loop
+        ),
+    }
 
 
-def reflect_on_summary(state: SummaryState, config: RunnableConfig):
-    """Reflect on the summary and generate a follow-up query"""
+def lookup_archive(state: SummaryState, config: RunnableConfig):
+    """Look for an archived report on a close topic before researching.
 
+    A near-identical recent match is returned as is; a similar one seeds
+    running_summary and sources and limits the run to one refresh loop.
+    """
+    # Start the overall research timer: this is always the run's first node
+    start = time.time()
     configurable = Configuration.from_runnable_config(config)
-    llm_json_mode = ChatOllama(
-        model=configurable.local_llm, temperature=0, format="json"
-    )
-    result = llm_json_mode.invoke(
-        [
-            SystemMessage(
-                content=reflection_instructions.format(
-                    research_topic=state.research_topic
-                )
-            ),
-            HumanMessage(
-                content=f"Identify a knowledge gap and generate a follow-up web search query based on our existing knowledge: {state.running_summary}"
-            ),
-        ]
+    if not configurable.research_archive_path:
+        return {"timings": {"start": start}}
+
+    # The run's budget starts here when the archive is consulted first
+    deadline = state.deadline or new_deadline(configurable)
+    archive = ResearchArchive(configurable.research_archive_path)
+    embedding = embed_text(configurable, state.research_topic, deadline=deadline)
+    match = archive.lookup(
+        state.research_topic,
+        embedding,
+        max_age_hours=max(configurable.archive_reuse_max_age_hours,
+                          configurable.archive_refresh_max_age_hours),
     )
-    follow_up_query = json.loads(result.content)
+    update = {
+        "deadline": deadline,
+        "topic_embedding": embedding,
+        "timings": {"start": start, "archive_lookup": time.time() - start},
+    }
+    if match is None:
+        return update
+
+    if (match.similarity >= configurable.archive_reuse_similarity
+            and match.age_hours <= configurable.archive_reuse_max_age_hours):
+        return {**update, "running_summary": match.report, "reused_report": True}
+    if (match.similarity >= configurable.archive_refresh_similarity
+            and match.age_hours <= configurable.archive_refresh_max_age_hours):
+        return {
+            **update,
+            "running_summary": match.summary,
+            "sources_gathered": match.sources,
+            "loop_budget": 1,
+        }
+    return update
+
+
+def route_archive(
+    state: SummaryState, config: RunnableConfig
+) -> Literal["send_email", "plan_aspects", "generate_query"]:
+    """Deliver an archived report directly, or research the topic.
 
-    query = follow_up_query.get("follow_up_query")
-    if not query:
-        return {"search_query": f"Tell me more about {state.research_topic}"}
+    Runs with ``research_aspects`` above 1 research it in parallel aspects.
+    """
+    if state.reused_report:
+        return "send_email"
+    if Configuration.from_runnable_config(config).research_aspects > 1:
+        return "plan_aspects"
+    return "generate_query"
+
+
+def merge_aspects(state: SummaryState, config: RunnableConfig):
+    """Merge the per-aspect summaries into one summary."""
+    start = time.time()
+    summaries = [(aspect, summary) for aspect, summary in state.aspect_summaries if summary]
+    if len(summaries) <= 1:
+        # A single branch already wrote the whole summary
+        return {"running_summary": summaries[0][1] if summaries else state.running_summary}
 
-    return {"search_query": follow_up_query["follow_up_query"]}
+    blocks = "\n\n".join(
+        f"<Aspect: {aspect}>\n{summary}\n</Aspect: {aspect}>" for aspect, summary in summaries
+    )
+    configurable = Configuration.from_runnable_config(config)
+    try:
+        result = invoke_llm(
+            configurable,
+            "merge_aspects",
+            [
+                SystemMessage(content=aspect_merge_instructions),
+                HumanMessage(content=f"<User Input>\n{state.research_topic}\n</User Input>\n\n{blocks}"),
+            ],
+            deadline=state.deadline,
+            session=state.research_topic,
+            temperature=0,
+        )
+        running_summary = _strip_think(result.content)
+    except DeadlineExceeded:
+        # Out of time: deliver the aspect summaries one after another
+        running_summary = "\n\n".join(f"### {aspect}\n\n{summary}" for aspect, summary in summaries)
 
+    return {
+        "running_summary": running_summary,
+        "timings": {"merge_aspects": time.time() - start},
+    }
 
-def finalize_summary(state: SummaryState):
-    if 'start' in state.timings:
-        state.timings['total_research_time'] = time.time() - state.timings['start']
+
+def finalize_summary(state: SummaryState, config: RunnableConfig):
+    timings = dict(state.timings)
+    if 'start' in timings:
+        timings['total_research_time'] = time.time() - timings['start']
         
     # Format all accumulated sources into a single bulleted list
     all_sources = "\n".join(source for source in state.sources_gathered)
     title = f"# Research Topic: {state.research_topic}\n\n"
-    state.running_summary = (
+    summary = state.running_summary or "No summary could be produced within the time budget."
+    running_summary = (
         f"{title}"
         f"## Summary\n\n"
-        f"{state.running_summary}\n\n"
+        f"{summary}\n\n"
         f"### Sources:\n{all_sources}"
     )
 
     # Append Timings section
-    if state.timings:
+    if timings:
         timing_lines = "\n".join(f"* {step}: {secs:.2f}s"
-                                 for step, secs in state.timings.items())
-        state.running_summary += f"\n\n### Timings (s)\n{timing_lines}"
+                                 for step, secs in timings.items())
+        running_summary += f"\n\n### Timings (s)\n{timing_lines}"
+
+    configurable = Configuration.from_runnable_config(config)
+    if configurable.research_archive_path and state.running_summary:
+        ResearchArchive(configurable.research_archive_path).add(
+            topic=state.research_topic,
+            summary=state.running_summary,
+            report=running_summary,
+            sources=state.sources_gathered,
+            timings=timings,
+            embedding=state.topic_embedding,
+        )
 
     # return both the markdown and the raw timings dict
     return {
-        "running_summary": state.running_summary,
-        "timings": state.timings
+        "running_summary": running_summary,
+        "timings": timings
     }
 
 
@@ -360,6 +682,10 @@ def route_research(
     """Route the research based on the follow-up query"""
 
     configurable = Configuration.from_runnable_config(config)
+    if _degradation(state, configurable).finalize:
+        return "finalize_summary"
+    if state.loop_budget is not None and state.research_loop_count >= state.loop_budget:
+        return "finalize_summary"
     if state.research_loop_count <= configurable.max_web_research_loops:
         return "web_research"
     else:
@@ -367,47 +693,165 @@ def route_research(
 
 
 def recall_memory(state: SummaryState, config: RunnableConfig):
-    """Fetch relevant past chunks from Pinecone memory."""
+    """Fetch past chunks relevant to this loop's query from Pinecone memory.
+
+    Runs alongside the source fetches every loop. New recalls are merged
+    after the ones already in state, dropping duplicates; past
+    ``memory_max_chunks`` the lowest-scoring chunks are dropped.
+    """
+    start = time.time()
     cfg = Configuration.from_runnable_config(config)
-    recalls = semantic_recall(state.search_query, top_k=5, config=cfg)
-    state.memory = recalls
-    return {"memory": state.memory}
+    if not memory_enabled(cfg):
+        # Pinecone is not configured for this run
+        return {}
+    try:
+        recalls = call_with_deadline(
+            cached_semantic_recall,
+            state.search_query,
+            top_k=cfg.memory_top_k,
+            config=cfg,
+            namespace=memory_namespace(state.research_topic, cfg),
+            deadline=state.deadline,
+        )
+    except DeadlineExceeded:
+        return {}
+
+    scores = dict(zip(state.memory, state.memory_scores))
+    for text, score in recalls:
+        scores[text] = max(score, scores.get(text, score))
+    kept = set(sorted(scores, key=scores.get, reverse=True)[:cfg.memory_max_chunks])
+    # Kept chunks stay in place and new ones are appended, so memory remains
+    # a cached prompt prefix for summarize_sources up to the first change
+    memory = [text for text in scores if text in kept]
+    return {
+        "memory": memory,
+        "memory_scores": [scores[text] for text in memory],
+        "timings": {"recall_memory": time.time() - start},
+    }
+
 
+# Graph node implementing each provider's ``node`` (see providers.py)
+SOURCE_NODES = {
+    "web_research": web_research,
+    "youtube_research": youtube_research,
+    "wikipedia_research": wikipedia_research,
+    "arxiv_research": arxiv_research,
+}
 
 
+def _add_node(builder: StateGraph, name: str, node) -> None:
+    """Add a node, profiled per call when the run sets ``profile_dir``."""
+    builder.add_node(name, profiled(node, name))
+
+
+def _add_research_loop(builder: StateGraph, configurable: Configuration, exit_node: str) -> str:
+    """Add the search/summarize/reflect loop to ``builder``; return its entry node."""
+    # Requirements (e.g. the YouTube key) are checked by each node at run time
+    source_nodes = [PROVIDERS[name].node for name in requested_sources(configurable)]
+
+    _add_node(builder, "generate_query", generate_query)
+    # Wired even without Pinecone in the environment: a run may configure it
+    _add_node(builder, "recall_memory", recall_memory)
+    for name in source_nodes:
+        _add_node(builder, name, SOURCE_NODES[name])
+    _add_node(builder, "summarize_sources", summarize_sources)
+    _add_node(builder, "reflect_on_summary", reflect_on_summary)
+
+    # Add edges. Each loop starts the first source and memory recall together;
+    # sources then run in turn and summarization waits for both branches.
+    joins = source_nodes[-1:] + ["recall_memory"]
+    loop_entry = source_nodes[:1] + ["recall_memory"]
+
+    for upstream, downstream in zip(source_nodes, source_nodes[1:]):
+        builder.add_edge(upstream, downstream)
+    builder.add_edge(joins if len(joins) > 1 else joins[0], "summarize_sources")
+
+    for node in loop_entry:
+        builder.add_edge("generate_query", node)
+    builder.add_edge("summarize_sources", "reflect_on_summary")
+
+    def next_loop(state: SummaryState, config: RunnableConfig):
+        if route_research(state, config) == "finalize_summary":
+            return exit_node
+        return loop_entry
+
+    builder.add_conditional_edges(
+        "reflect_on_summary", next_loop, loop_entry + [exit_node]
+    )
+    return "generate_query"
+
 
 # Add nodes and edges
-builder = StateGraph(
-    SummaryState,
-    input=SummaryStateInput,
-    output=SummaryStateOutput,
-    config_schema=Configuration,
-)
+def build_graph(configurable: Optional[Configuration] = None):
+    """Compile the research graph wired with only the enabled sources.
+
+    The loop is wired twice: inline, and as a subgraph that runs once per
+    planned aspect, concurrently, before merge_aspects. Each run takes the
+    aspect path when its ``research_aspects`` is above 1.
+    """
+    configurable = configurable or Configuration.from_runnable_config()
+
+    builder = StateGraph(
+        SummaryState,
+        input=SummaryStateInput,
+        output=SummaryStateOutput,
+        config_schema=Configuration,
+    )
+
+    # Aspect branches run the loop as a subgraph, one invocation per aspect
+    loop = StateGraph(SummaryState, config_schema=Configuration)
+    loop.add_edge(START, _add_research_loop(loop, configurable, END))
+    aspect_graph = loop.compile()
+
+    def research_aspect(state: SummaryState, config: RunnableConfig):
+        """Run the research loop on one aspect."""
+        if isinstance(state, dict):  # Send payloads may arrive as plain dicts
+            state = SummaryState(**state)
+        start = time.time()
+        result = aspect_graph.invoke(
+            {
+                "research_topic": state.research_topic,
+                "aspect": state.aspect,
+                "running_summary": state.running_summary,
+                "deadline": state.deadline,
+                "loop_budget": state.loop_budget,
+                "timings": state.timings,
+            },
+            config,
+        )
+        return {
+            "aspect_summaries": [(state.aspect, result.get("running_summary"))],
+            "sources_gathered": result.get("sources_gathered", []),
+            "timings": {f"aspect: {state.aspect or state.research_topic}": time.time() - start},
+        }
+
+    _add_node(builder, "plan_aspects", plan_aspects)
+    # Not profiled itself: the nodes of its branch are profiled individually
+    builder.add_node("research_aspect", research_aspect)
+    _add_node(builder, "merge_aspects", merge_aspects)
+    builder.add_conditional_edges("plan_aspects", fan_out_aspects, ["research_aspect"])
+    builder.add_edge("research_aspect", "merge_aspects")
+    builder.add_edge("merge_aspects", "finalize_summary")
+    # Runs researching the topic as a whole use the loop inline
+    research_entry = _add_research_loop(builder, configurable, "finalize_summary")
+
+    _add_node(builder, "lookup_archive", lookup_archive)
+    _add_node(builder, "finalize_summary", finalize_summary)
+    _add_node(builder, "send_email", send_email)
+    _add_node(builder, "send_to_discord", send_to_discord)
+
+    # lookup_archive passes straight through when the run has no archive path
+    builder.add_edge(START, "lookup_archive")
+    builder.add_conditional_edges(
+        "lookup_archive",
+        route_archive,
+        {"send_email": "send_email", "plan_aspects": "plan_aspects", "generate_query": research_entry},
+    )
+    builder.add_edge("finalize_summary", "send_email")
+    builder.add_edge("send_email", "send_to_discord")
+    builder.add_edge("send_to_discord", END)
+
+    return builder.compile()
+
 
-builder.add_node("generate_query", generate_query)
-builder.add_node("recall_memory", recall_memory)
-builder.add_node("web_research", web_research)
-builder.add_node("youtube_research", youtube_research)  # new node for YouTube research
-builder.add_node("wikipedia_research", wikipedia_research)
-builder.add_node("arxiv_research", arxiv_research)
-builder.add_node("summarize_sources", summarize_sources)
-builder.add_node("reflect_on_summary", reflect_on_summary)
-builder.add_node("finalize_summary", finalize_summary)
-builder.add_node("send_email", send_email)
-builder.add_node("send_to_discord", send_to_discord)
-
-# Add edges
-builder.add_edge(START, "generate_query")
-builder.add_edge("generate_query", "recall_memory")
-builder.add_edge("recall_memory", "web_research")
-builder.add_edge("web_research", "youtube_research")  # route to YouTube research after web research
-builder.add_edge("youtube_research", "wikipedia_research")
-builder.add_edge("wikipedia_research", "arxiv_research")
-builder.add_edge("arxiv_research", "summarize_sources")
-builder.add_edge("summarize_sources", "reflect_on_summary")
-builder.add_conditional_edges("reflect_on_summary", route_research)
-builder.add_edge("finalize_summary", "send_email")
-builder.add_edge("send_email", "send_to_discord")
-builder.add_edge("send_to_discord", END)
-
-graph = builder.compile()
\ No newline at end of file
+graph = build_graph()
@@ -0,0 +1,398 @@
+"""Durable SQLite job queue for batches of research runs.
+
+Topics are enqueued into a SQLite file and worked off by a pool of worker
+processes, each running one graph invocation at a time. A worker holds a
+lease on its job and renews it while the run is going; if the worker
+crashes, the lease expires and the job becomes visible to other workers
+again. Failed runs are retried with a backoff up to ``max_attempts``.
+
+    python -m assistant.jobs enqueue jobs.sqlite "topic one" "topic two"
+    python -m assistant.jobs work jobs.sqlite
+    python -m assistant.jobs status jobs.sqlite --watch 30
+
+By default ``work`` starts ``ollama_num_parallel`` workers per Ollama host
+in ``ollama_base_urls``, since the LLM calls are what a run waits on.
+Several ``work`` commands may share one queue file, on one machine or on
+machines sharing a filesystem with working SQLite locking.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from assistant.configuration import Configuration
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    configurable TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at);
+"""
+
+LEASE_SECONDS = 600  # a run not renewed for this long is handed to another worker
+RETRY_BACKOFF_SECONDS = 30  # times the attempt number
+THROUGHPUT_WINDOW = 600  # seconds of finished jobs used for the jobs/min rate
+RENEW_RETRY_SECONDS = 5  # wait before retrying a lease renewal that hit a database error
+
+logger = logging.getLogger(__name__)
+
+_initialized: set[str] = set()
+_init_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Job:
+    """A claimed research run."""
+
+    id: int
+    topic: str
+    configurable: dict
+    attempts: int
+
+
+class JobQueue:
+    """SQLite-backed queue with leases, retries and visibility timeouts."""
+
+    def __init__(self, path: str):
+        """Open the queue at ``path``, creating its tables on first use."""
+        self.path = os.path.expanduser(path)
+        with _init_lock:
+            if self.path not in _initialized:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+                    # WAL lets status readers and workers proceed while one claims a job
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                _initialized.add(self.path)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Yield a connection holding the write lock for the whole block."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _reading(self):
+        """Yield a connection reading one consistent snapshot, without the write lock."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            # Deferred: under WAL, readers never wait for a worker claiming a job
+            conn.execute("BEGIN DEFERRED")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, topic: str, configurable: Optional[dict] = None,
+                max_attempts: int = 3) -> int:
+        """Add a run to the queue and return its job id."""
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (topic, configurable, status, max_attempts, available_at, enqueued_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)",
+                (topic, json.dumps(configurable or {}), max_attempts, now, now),
+            )
+            return cur.lastrowid
+
+    def claim(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Optional[Job]:
+        """Lease the next available job, including ones whose lease has expired."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Runs whose worker vanished on their last attempt will not be retried
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_owner = NULL, "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = conn.execute(
+                "SELECT id, topic, configurable, attempts FROM jobs "
+                "WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, topic, configurable, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = ?, lease_owner = ?, lease_expires = ? "
+                "WHERE id = ?",
+                (attempts + 1, worker, now + lease_seconds, job_id),
+            )
+        return Job(job_id, topic, json.loads(configurable), attempts + 1)
+
+    def heartbeat(self, job_id: int, worker: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """Extend the lease; False if the job was handed to another worker."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: dict[str, Any]) -> bool:
+        """Store a finished run's result; False if the lease was lost meanwhile."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, lease_owner = NULL, result = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time(), json.dumps(result, default=str), job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str) -> None:
+        """Requeue a failed run with a backoff, or mark it failed after its last attempt."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return
+            attempts, max_attempts = row
+            if attempts >= max_attempts:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, lease_owner = NULL, error = ? "
+                    "WHERE id = ?",
+                    (now, error, job_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, lease_owner = NULL, error = ? "
+                    "WHERE id = ?",
+                    (now + RETRY_BACKOFF_SECONDS * attempts, error, job_id),
+                )
+
+    def result(self, job_id: int) -> Optional[dict[str, Any]]:
+        """Return a job's status, attempts, result and last error."""
+        with self._reading() as conn:
+            row = conn.execute(
+                "SELECT topic, status, attempts, result, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        topic, status, attempts, result, error = row
+        return {
+            "topic": topic,
+            "status": status,
+            "attempts": attempts,
+            "result": json.loads(result) if result else None,
+            "error": error,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """Job counts per status and recent throughput."""
+        now = time.time()
+        with self._reading() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            recent = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'done' AND finished_at >= ?",
+                (now - THROUGHPUT_WINDOW,),
+            ).fetchone()[0]
+        stats = {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+        stats["jobs_per_minute"] = recent / (THROUGHPUT_WINDOW / 60)
+        return stats
+
+
+def _renew_lease(queue: JobQueue, job_id: int, worker: str, lease_seconds: float,
+                 finished: threading.Event) -> None:
+    """Renew a job's lease until ``finished`` is set or the lease is lost."""
+    wait = lease_seconds / 3
+    while not finished.wait(wait):
+        try:
+            if not queue.heartbeat(job_id, worker, lease_seconds):
+                return  # another worker holds the job now
+        except sqlite3.OperationalError as e:
+            # E.g. a lock timeout: giving up would let the lease expire and a
+            # second worker run the same job, so retry well before it does
+            logger.warning("renewing the lease on job %s failed, retrying: %s", job_id, e)
+            wait = min(lease_seconds / 3, RENEW_RETRY_SECONDS)
+        else:
+            wait = lease_seconds / 3
+
+
+def run_worker(path: str, worker: Optional[str] = None, lease_seconds: float = LEASE_SECONDS,
+               poll_seconds: float = 2.0, exit_when_empty: bool = False) -> int:
+    """Claim and run jobs until stopped (or the queue is empty); return jobs done."""
+    from assistant.graph import build_graph
+
+    queue = JobQueue(path)
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    graphs = {}
+    done = 0
+    while True:
+        job = queue.claim(worker, lease_seconds)
+        if job is None:
+            stats = queue.stats()
+            if exit_when_empty and not stats["queued"] and not stats["running"]:
+                return done
+            time.sleep(poll_seconds)
+            continue
+
+        # Keep the lease alive for as long as the run takes
+        finished = threading.Event()
+        renewer = threading.Thread(
+            target=_renew_lease, args=(queue, job.id, worker, lease_seconds, finished), daemon=True,
+        )
+        renewer.start()
+        try:
+            config = {"configurable": job.configurable}
+            key = json.dumps(job.configurable, sort_keys=True)
+            if key not in graphs:
+                graphs[key] = build_graph(Configuration.from_runnable_config(config))
+            output = graphs[key].invoke({"research_topic": job.topic}, config)
+        except Exception:
+            finished.set()
+            queue.fail(job.id, worker, traceback.format_exc(limit=5))
+            continue
+        finished.set()
+        result = {k: output.get(k) for k in ("running_summary", "timings")}
+        if queue.complete(job.id, worker, result):
+            done += 1
+
+
+def default_workers(configurable: Configuration) -> int:
+    """Worker processes to start: ollama_num_parallel per Ollama host."""
+    hosts = [u for u in configurable.ollama_base_urls.split(",") if u.strip()]
+    return max(1, len(hosts) * configurable.ollama_num_parallel)
+
+
+def _format_stats(stats: dict[str, Any]) -> str:
+    line = (f"queued {stats['queued']}  running {stats['running']}  done {stats['done']}  "
+            f"failed {stats['failed']}  {stats['jobs_per_minute']:.2f} jobs/min")
+    pending = stats["queued"] + stats["running"]
+    if pending and stats["jobs_per_minute"]:
+        line += f"  eta {pending / stats['jobs_per_minute']:.0f} min"
+    return line
+
+
+def work(path: str, processes: int, lease_seconds: float, exit_when_empty: bool,
+         report_seconds: float) -> None:
+    """Run worker processes, restarting crashed ones, and report progress."""
+    import multiprocessing
+
+    context = multiprocessing.get_context("spawn")
+    queue = JobQueue(path)
+
+    def start():
+        proc = context.Process(
+            target=run_worker,
+            kwargs={"path": path, "lease_seconds": lease_seconds, "exit_when_empty": exit_when_empty},
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    workers = [start() for _ in range(processes)]
+    try:
+        while workers:
+            time.sleep(report_seconds)
+            print(_format_stats(queue.stats()), flush=True)
+            alive = []
+            for proc in workers:
+                if proc.is_alive():
+                    alive.append(proc)
+                elif proc.exitcode != 0:
+                    # Its job's lease expires and is retried; replace the worker
+                    print(f"worker {proc.pid} exited with {proc.exitcode}, restarting", flush=True)
+                    alive.append(start())
+            workers = alive
+    except KeyboardInterrupt:
+        for proc in workers:
+            proc.terminate()
+    print(_format_stats(queue.stats()), flush=True)
+
+
+def main() -> None:
+    """Enqueue topics, run workers or report on a queue from the command line."""
+    parser = argparse.ArgumentParser(description="Queue research runs and work them off.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enqueue = sub.add_parser("enqueue", help="add topics to the queue")
+    enqueue.add_argument("path")
+    enqueue.add_argument("topics", nargs="*")
+    enqueue.add_argument("--file", default=None, help="read topics from this file, one per line")
+    enqueue.add_argument("--config", default="{}", help="JSON configurable values for these runs")
+    enqueue.add_argument("--max-attempts", type=int, default=3)
+    worker = sub.add_parser("work", help="run worker processes")
+    worker.add_argument("path")
+    worker.add_argument("--processes", type=int, default=None,
+                        help="default: ollama_num_parallel per Ollama host")
+    worker.add_argument("--lease", type=float, default=LEASE_SECONDS,
+                        help="seconds before an unrenewed job is given to another worker")
+    worker.add_argument("--exit-when-empty", action="store_true")
+    worker.add_argument("--report", type=float, default=30.0, help="seconds between progress lines")
+    status = sub.add_parser("status", help="show queue progress and throughput")
+    status.add_argument("path")
+    status.add_argument("--watch", type=float, default=None, help="repeat every N seconds")
+    show = sub.add_parser("show", help="print a job's result")
+    show.add_argument("path")
+    show.add_argument("job_id", type=int)
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        topics = list(args.topics)
+        if args.file:
+            with open(args.file, encoding="utf-8") as f:
+                topics += [line.strip() for line in f if line.strip()]
+        queue = JobQueue(args.path)
+        configurable = json.loads(args.config)
+        ids = [queue.enqueue(t, configurable, max_attempts=args.max_attempts) for t in topics]
+        print(f"enqueued {len(ids)} jobs" + (f" ({ids[0]}-{ids[-1]})" if ids else ""))
+    elif args.command == "work":
+        processes = args.processes or default_workers(Configuration.from_runnable_config())
+        print(f"starting {processes} workers on {args.path}", flush=True)
+        work(args.path, processes, args.lease, args.exit_when_empty, args.report)
+    elif args.command == "status":
+        queue = JobQueue(args.path)
+        while True:
+            print(_format_stats(queue.stats()), flush=True)
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    else:
+        job = JobQueue(args.path).result(args.job_id)
+        if job is None:
+            raise SystemExit(f"no job {args.job_id}")
+        if job["result"]:
+            print(job["result"]["running_summary"])
+        else:
+            print(f"{job['status']} after {job['attempts']} attempts\n{job['error'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Ollama endpoint pool and per-node model tiers.
+
+Every LLM call goes through invoke_llm(). It picks the model tier for the
+calling node and an endpoint from a pool of Ollama hosts
+(``ollama_base_urls``). The endpoint is the healthy one with the fewest
+requests in flight, but calls for the same session stay on the same host
+while it is not overloaded, so its prompt cache keeps getting re-used. When
+an endpoint fails to connect it is marked down, the call fails over to the
+next endpoint, and the failed one is probed again after a cool-down.
+
+Load is balanced per process: the in-flight counts only cover this
+process's calls, so several processes sharing the same hosts (e.g. job
+workers started by separate ``work`` commands) do not see each other's load.
+"""
+
+import threading
+import time
+from typing import Optional
+
+import requests
+from langchain_core.messages import AIMessage
+
+from assistant.cassette import intercept, request_key
+from assistant.configuration import Configuration
+from assistant.scheduler import DeadlineExceeded, call_with_deadline, remaining
+
+# Nodes that only need a short JSON answer run on the small model tier
+QUERY_NODES = {"plan_aspects", "generate_query", "reflect_on_summary"}
+# and the long-context writing calls on the large one
+SUMMARY_NODES = {"summarize_sources", "merge_aspects"}
+
+HEALTH_RETRY_SECONDS = 15  # how long a failed endpoint sits out before a probe
+AFFINITY_SLACK = 1  # extra in-flight calls tolerated to stay on a session's host
+MAX_SESSIONS = 1024
+EMBED_TIMEOUT_SECONDS = 30
+
+
+class Endpoint:
+    """An Ollama host and the calls this process has in flight on it."""
+
+    def __init__(self, url: str, lock: threading.Lock):
+        """Track ``url``; ``lock`` is the pool's, guarding in_flight and down_since."""
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.down_since: Optional[float] = None
+        self._lock = lock
+        self._probing = False
+
+    def available(self) -> bool:
+        """Return True if the endpoint is up, or probes healthy after its cool-down."""
+        with self._lock:
+            if self.down_since is None:
+                return True
+            if self._probing or time.time() - self.down_since < HEALTH_RETRY_SECONDS:
+                return False
+            # One caller probes; the others skip the host until the probe is done
+            self._probing = True
+        # The probe itself runs outside the lock so a dead host doesn't stall others
+        try:
+            requests.get(f"{self.url}/api/version", timeout=2).raise_for_status()
+            healthy = True
+        except requests.RequestException:
+            healthy = False
+        with self._lock:
+            self._probing = False
+            self.down_since = None if healthy else time.time()
+        return healthy
+
+
+class OllamaPool:
+    """Least-loaded, health-aware selection over Ollama endpoints with session affinity."""
+
+    def __init__(self, urls: list[str]):
+        """Pool the Ollama hosts at ``urls``."""
+        if not urls:
+            raise ValueError("No Ollama endpoints configured in ollama_base_urls.")
+        self._lock = threading.Lock()
+        self.endpoints = [Endpoint(url, self._lock) for url in urls]
+        self._sessions: dict[str, Endpoint] = {}
+
+    def acquire(self, session: Optional[str] = None, exclude: frozenset = frozenset()) -> Endpoint:
+        """Reserve an endpoint for one call; release() it afterwards."""
+        # available() takes the lock itself, around its probe
+        candidates = [
+            ep for ep in self.endpoints if ep.url not in exclude and ep.available()
+        ]
+        if not candidates:
+            raise ConnectionError("No healthy Ollama endpoint available.")
+        with self._lock:
+            chosen = min(candidates, key=lambda ep: ep.in_flight)
+            pinned = self._sessions.get(session) if session else None
+            if pinned in candidates and pinned.in_flight <= chosen.in_flight + AFFINITY_SLACK:
+                chosen = pinned
+            elif session:
+                if len(self._sessions) >= MAX_SESSIONS:
+                    self._sessions.pop(next(iter(self._sessions)))
+                self._sessions[session] = chosen
+            chosen.in_flight += 1
+            return chosen
+
+    def release(self, endpoint: Endpoint, failed: bool = False) -> None:
+        """Return an endpoint to the pool, marking it down if the call could not reach it."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            if failed:
+                endpoint.down_since = time.time()
+
+
+_pools: dict[tuple[str, ...], OllamaPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(configurable: Configuration) -> OllamaPool:
+    """Return the process-wide pool for the configured endpoints."""
+    urls = tuple(u.strip() for u in configurable.ollama_base_urls.split(",") if u.strip())
+    with _pools_lock:
+        if urls not in _pools:
+            _pools[urls] = OllamaPool(list(urls))
+        return _pools[urls]
+
+
+def model_for(configurable: Configuration, node: str) -> str:
+    """Return the model tier for a node, falling back to local_llm."""
+    if node in QUERY_NODES:
+        return configurable.query_llm or configurable.local_llm
+    if node in SUMMARY_NODES:
+        return configurable.summarizer_llm or configurable.local_llm
+    return configurable.local_llm
+
+
+def embed_text(configurable: Configuration, text: str,
+               deadline: Optional[float] = None) -> Optional[list[float]]:
+    """Embed ``text`` with ``embedding_model`` on the pool, or None if that fails."""
+    timeout = min(EMBED_TIMEOUT_SECONDS, remaining(deadline))
+    if timeout <= 0:
+        return None
+    pool = get_pool(configurable)
+    try:
+        endpoint = pool.acquire()
+    except ConnectionError:
+        return None
+    failed = False
+    try:
+        resp = requests.post(
+            f"{endpoint.url}/api/embed",
+            json={"model": configurable.embedding_model, "input": text,
+                  "keep_alive": configurable.ollama_keep_alive},
+            timeout=timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()["embeddings"][0]
+    except requests.ConnectionError:
+        failed = True
+        return None
+    except (requests.RequestException, KeyError, IndexError):
+        return None
+    finally:
+        pool.release(endpoint, failed=failed)
+
+
+def invoke_llm(configurable: Configuration, node: str, messages: list,
+               deadline: Optional[float] = None, session: Optional[str] = None,
+               **kwargs):
+    """Run a chat completion for ``node`` on the pool, failing over between endpoints.
+
+    Args:
+        configurable: Run configuration (endpoints, model tiers, Ollama options)
+        node: Calling graph node, used to pick the model tier
+        messages: Chat messages to send
+        deadline: Run deadline; the call is abandoned once it passes
+        session: Affinity key keeping a run's calls on one host
+        **kwargs: Extra ChatOllama options (e.g. temperature, format)
+    """
+    return intercept(
+        f"llm:{node}",
+        request_key(model_for(configurable, node), [(m.type, m.content) for m in messages]),
+        lambda: _invoke_on_pool(configurable, node, messages, deadline, session, **kwargs),
+        encode=lambda result: {
+            "content": result.content,
+            "response_metadata": result.response_metadata,
+        },
+        decode=lambda data: AIMessage(**data),
+    )
+
+
+def _invoke_on_pool(configurable: Configuration, node: str, messages: list,
+                    deadline: Optional[float], session: Optional[str], **kwargs):
+    import httpx
+    from langchain_ollama import ChatOllama
+
+    # Identical model options on every call keep one loaded runner (and its
+    # KV cache) for the whole run; a differing num_ctx would force a reload.
+    if configurable.ollama_num_ctx:
+        kwargs.setdefault("num_ctx", configurable.ollama_num_ctx)
+    if deadline is not None:
+        # The HTTP client gives up with the budget, so abandoned calls don't linger
+        kwargs["client_kwargs"] = {"timeout": max(remaining(deadline), 1.0)}
+
+    pool = get_pool(configurable)
+    tried: set[str] = set()
+    while True:
+        endpoint = pool.acquire(session, exclude=frozenset(tried))
+        llm = ChatOllama(
+            base_url=endpoint.url,
+            model=model_for(configurable, node),
+            keep_alive=configurable.ollama_keep_alive,
+            **kwargs,
+        )
+        failed = False
+        try:
+            return call_with_deadline(llm.invoke, messages, deadline=deadline)
+        except (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout,
+                httpx.RemoteProtocolError) as exc:
+            # Endpoint unreachable: mark it down and fail over to the next one
+            failed = True
+            tried.add(endpoint.url)
+            if remaining(deadline) <= 0:
+                raise DeadlineExceeded(node) from exc
+            if len(tried) == len(pool.endpoints):
+                raise
+        finally:
+            pool.release(endpoint, failed=failed)
@@ -0,0 +1,153 @@
+"""Local index of the memory records already written to Pinecone.
+
+Memory records are content-addressed: the record id is a hash of the text,
+so a chunk that is already stored in a namespace can be recognised locally
+and skip the embed + upsert round trip. The index also remembers when each
+record was last seen, which the compaction job uses to expire stale records:
+
+    python -m assistant.memory_index compact --max-age-days 30
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from assistant.configuration import Configuration
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    namespace TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (namespace, record_id)
+)
+"""
+
+_initialized: set[str] = set()
+_init_lock = threading.Lock()
+
+
+def content_id(text: str) -> str:
+    """Return the content-addressed record id for a memory chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def memory_namespace(topic: str, config: Configuration) -> str:
+    """Return the Pinecone namespace for a topic: the configured tenant, or one per topic."""
+    if config.memory_namespace:
+        return config.memory_namespace
+    from assistant.utils import normalize_query
+
+    slug = "-".join(normalize_query(topic or "").split())[:48]
+    return f"topic-{slug}" if slug else "topic-default"
+
+
+class MemoryIndex:
+    """SQLite-backed set of (namespace, record_id) pairs known to be stored."""
+
+    def __init__(self, path: str):
+        """Open the index at ``path``, creating its table on first use."""
+        self.path = os.path.expanduser(path)
+        with _init_lock:
+            if self.path not in _initialized:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with self._connect() as conn:
+                    conn.execute(_SCHEMA)
+                _initialized.add(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def seen(self, namespace: str, record_id: str, max_age_days: Optional[float] = None) -> bool:
+        """Return True (and refresh last_seen) if the record is already stored.
+
+        A record stored more than ``max_age_days`` ago counts as unseen: it
+        may have been expired from Pinecone meanwhile (e.g. by a compaction
+        run elsewhere), so the caller writes it again, which calls add().
+        """
+        now = time.time()
+        stored_after = now - max_age_days * 86400 if max_age_days is not None else 0
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE records SET last_seen = ? "
+                "WHERE namespace = ? AND record_id = ? AND stored_at >= ?",
+                (now, namespace, record_id, stored_after),
+            )
+            return cur.rowcount > 0
+
+    def add(self, namespace: str, record_id: str) -> None:
+        """Record that a chunk has been upserted."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                (namespace, record_id, now, now),
+            )
+
+    def stale(self, older_than: float, namespace: Optional[str] = None) -> dict[str, list[str]]:
+        """Return record ids not seen since ``older_than`` (epoch seconds), by namespace."""
+        query = "SELECT namespace, record_id FROM records WHERE last_seen < ?"
+        params: tuple = (older_than,)
+        if namespace is not None:
+            query += " AND namespace = ?"
+            params += (namespace,)
+        stale: dict[str, list[str]] = {}
+        with self._connect() as conn:
+            for ns, record_id in conn.execute(query, params):
+                stale.setdefault(ns, []).append(record_id)
+        return stale
+
+    def remove(self, namespace: str, record_ids: list[str]) -> None:
+        """Forget records that were deleted from Pinecone."""
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM records WHERE namespace = ? AND record_id = ?",
+                [(namespace, record_id) for record_id in record_ids],
+            )
+
+
+def compact_memory(config: Configuration, max_age_days: float,
+                   namespace: Optional[str] = None, dry_run: bool = False) -> int:
+    """Delete memory records not seen for ``max_age_days`` from Pinecone and the index."""
+    from assistant.utils import _init_pinecone
+
+    index = MemoryIndex(config.memory_index_path)
+    stale = index.stale(time.time() - max_age_days * 86400, namespace=namespace)
+    if dry_run:
+        return sum(len(ids) for ids in stale.values())
+
+    idx = _init_pinecone(config)
+    deleted = 0
+    for ns, ids in stale.items():
+        for i in range(0, len(ids), 1000):  # Pinecone deletes at most 1000 ids per call
+            batch = ids[i:i + 1000]
+            idx.delete(ids=batch, namespace=ns)
+            index.remove(ns, batch)
+            deleted += len(batch)
+    return deleted
+
+
+def main() -> None:
+    """Compact the memory index from the command line."""
+    parser = argparse.ArgumentParser(description="Maintain the Pinecone memory index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="expire records not seen recently")
+    compact.add_argument("--max-age-days", type=float, default=None)
+    compact.add_argument("--namespace", default=None)
+    compact.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    cfg = Configuration.from_runnable_config()
+    max_age = args.max_age_days if args.max_age_days is not None else cfg.memory_ttl_days
+    count = compact_memory(cfg, max_age, namespace=args.namespace, dry_run=args.dry_run)
+    verb = "would delete" if args.dry_run else "deleted"
+    print(f"{verb} {count} memory records older than {max_age:g} days")
+
+
+if __name__ == "__main__":
+    main()
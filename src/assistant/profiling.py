@@ -0,0 +1,176 @@
+"""Opt-in per-node CPU and allocation profiling.
+
+With ``profile_dir`` set (in the environment or per run), every graph node
+call runs under its own cProfile profiler and tracemalloc, and writes two
+artifacts to ``<profile_dir>/<run>/``: ``<node>.<n>.pstats`` and
+``<node>.<n>.snapshot`` (a tracemalloc snapshot of the memory held when the
+node returned). ``<run>`` is the run's ``thread_id`` when it has one, else
+the topic and the time the run started. The summary command ranks
+functions and allocation sites across every run under the directory:
+
+    python -m assistant.profiling summary ~/profiles --top 25
+
+Nodes keep running concurrently while profiled. Tracing is process-wide,
+so a snapshot taken while other nodes run also holds their allocations.
+Provider calls only run on the node's thread, and are attributed to it,
+when ``run_budget_seconds`` is unset.
+"""
+
+import argparse
+import cProfile
+import functools
+import glob
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Optional
+
+from assistant.configuration import Configuration
+
+# Guards starting/stopping tracemalloc and the count of profiled nodes running
+_lock = threading.Lock()
+_active = 0
+_owns_tracing = False  # tracemalloc was started here, not by the caller
+
+
+def _run_name(state, update, config: Optional[dict]) -> str:
+    """Directory name shared by every node of one run."""
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    if thread_id:
+        return str(thread_id)
+    if not isinstance(state, dict):
+        state = vars(state)
+    # The first node stamps the start time in its update; later ones see it in state
+    started = (state.get("timings") or {}).get("start")
+    if started is None and isinstance(update, dict):
+        started = (update.get("timings") or {}).get("start")
+    slug = "-".join(re.findall(r"\w+", (state.get("research_topic") or "").lower()))[:48] or "run"
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(started or time.time()))
+    return f"{slug}-{stamp}"
+
+
+def _start_tracing() -> None:
+    global _active, _owns_tracing
+    with _lock:
+        if _active == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        _active += 1
+
+
+def _stop_tracing() -> tracemalloc.Snapshot:
+    global _active, _owns_tracing
+    # Taken before this node stops counting as active, so tracing is still on
+    snapshot = tracemalloc.take_snapshot()
+    with _lock:
+        _active -= 1
+        if _active == 0 and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+    return snapshot
+
+
+def profiled(fn: Callable, node: str) -> Callable:
+    """Wrap a graph node so each call writes pstats and an allocation snapshot.
+
+    Whether to profile is decided per call from the run's ``profile_dir``.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        config = kwargs.get("config")
+        profile_dir = Configuration.from_runnable_config(config).profile_dir
+        if not profile_dir:
+            return fn(state, *args, **kwargs)
+
+        profiler = cProfile.Profile()
+        _start_tracing()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler; record allocations only
+            profiler = None
+        update = None
+        try:
+            update = fn(state, *args, **kwargs)
+            return update
+        finally:
+            if profiler:
+                profiler.disable()
+            snapshot = _stop_tracing()
+            directory = os.path.join(os.path.expanduser(profile_dir), _run_name(state, update, config))
+            os.makedirs(directory, exist_ok=True)
+            stem = os.path.join(directory, f"{node}.{time.time_ns()}")
+            if profiler:
+                profiler.dump_stats(f"{stem}.pstats")
+            snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ]).dump(f"{stem}.snapshot")
+
+    return wrapper
+
+
+def _node_of(path: str) -> str:
+    return os.path.basename(path).split(".", 1)[0]
+
+
+def summarize(profile_dir: str, top: int = 20, node: Optional[str] = None, sort: str = "tottime") -> None:
+    """Print the top functions and allocation sites across all profiled runs."""
+    root = os.path.expanduser(profile_dir)
+    stats_files = sorted(glob.glob(os.path.join(root, "**", "*.pstats"), recursive=True))
+    snapshot_files = sorted(glob.glob(os.path.join(root, "**", "*.snapshot"), recursive=True))
+    if node:
+        stats_files = [f for f in stats_files if _node_of(f) == node]
+        snapshot_files = [f for f in snapshot_files if _node_of(f) == node]
+    if not stats_files:
+        print(f"no profiles under {root}")
+        return
+
+    runs = {os.path.dirname(f) for f in stats_files}
+    per_node = defaultdict(lambda: [0, 0.0])
+    for path in stats_files:
+        per_node[_node_of(path)][0] += 1
+        per_node[_node_of(path)][1] += pstats.Stats(path).total_tt
+    print(f"{len(stats_files)} node calls in {len(runs)} runs\n")
+    print(f"{'node':<24} {'calls':>6} {'cpu (s)':>9}")
+    for name, (calls, seconds) in sorted(per_node.items(), key=lambda item: -item[1][1]):
+        print(f"{name:<24} {calls:>6} {seconds:>9.3f}")
+
+    print(f"\nTop {top} functions by {sort}")
+    stats = pstats.Stats(*stats_files)
+    stats.sort_stats(sort).print_stats(top)
+
+    sizes = defaultdict(int)
+    counts = defaultdict(int)
+    for path in snapshot_files:
+        for stat in tracemalloc.Snapshot.load(path).statistics("lineno"):
+            frame = stat.traceback[0]
+            sizes[(frame.filename, frame.lineno)] += stat.size
+            counts[(frame.filename, frame.lineno)] += stat.count
+    print(f"Top {top} allocation sites (memory held when the node returned)")
+    print(f"{'KiB':>10} {'blocks':>8}  site")
+    for site, size in sorted(sizes.items(), key=lambda item: -item[1])[:top]:
+        print(f"{size / 1024:>10.1f} {counts[site]:>8}  {site[0]}:{site[1]}")
+
+
+def main() -> None:
+    """Summarize profiles from the command line."""
+    parser = argparse.ArgumentParser(description="Summarize per-node profiles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="rank functions and allocation sites across runs")
+    summary.add_argument("profile_dir")
+    summary.add_argument("--top", type=int, default=20)
+    summary.add_argument("--node", default=None, help="only this node's profiles")
+    summary.add_argument("--sort", default="tottime", help="pstats sort key, e.g. cumulative")
+    args = parser.parse_args()
+    summarize(args.profile_dir, top=args.top, node=args.node, sort=args.sort)
+
+
+if __name__ == "__main__":
+    main()
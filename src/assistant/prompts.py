@@ -23,11 +23,14 @@ Example output:
 
 Provide your response in JSON format:"""
 
-summarizer_instructions = """
-+<Memory>
-+{memory}
-+</Memory>
+# Appended to the query and reflection requests when queries_per_loop > 1
+multi_query_instructions = """
+
+<MULTIPLE QUERIES>
+Also include the key "{key}": a list of {count} distinct web search queries, ranked from most to least useful, that together cover different parts of the topic. Its first entry must be the same as "{primary_key}".
+</MULTIPLE QUERIES>"""
 
+summarizer_instructions = """
 <GOAL>
 Generate a high-quality, concise summary organized into exactly these four sections:
   1. **Background** (key definitions & context from Wikipedia)
@@ -62,6 +65,43 @@ Think carefully about the provided Context first. Then generate a summary of the
 </Task>
 """
 
+# Human message for summarize_sources. Consecutive calls share a prefix
+# Ollama can serve from its KV cache: the static system prompt, then blocks
+# from most to least stable within a run. The topic never changes, recalled
+# memory keeps its order and changes only where a better chunk replaces a
+# weaker one or a new one is appended, the existing summary is rewritten
+# every loop, and the sources are new every loop. This is the order the
+# prompt always had; benchmarks/prefix_reuse.py shows that moving the
+# summary ahead of memory would prefill about half as many tokens again.
+summarizer_context = """<User Input>
+{research_topic}
+</User Input>
+
+<Memory>
+{memory}
+</Memory>
+
+<Existing Summary>
+{existing_summary}
+</Existing Summary>
+
+<Background (Wikipedia)>
+{wikipedia}
+</Background (Wikipedia)>
+
+<Academic Findings (arXiv)>
+{arxiv}
+</Academic Findings (arXiv)>
+
+<Industry Examples (Web)>
+{web}
+</Industry Examples (Web)>
+
+<Industry Examples (YouTube)>
+{youtube}
+</Industry Examples (YouTube)>
+"""
+
 reflection_instructions = """You are an expert research assistant analyzing a summary about {research_topic}.
 
 <GOAL>
@@ -89,3 +129,53 @@ Reflect carefully on the Summary to identify knowledge gaps and produce a follow
 </Task>
 
 Provide your analysis in JSON format:"""
+
+aspect_planner_instructions = """Your goal is to break a research topic into distinct aspects that can be researched independently.
+
+<TOPIC>
+{research_topic}
+</TOPIC>
+
+<REQUIREMENTS>
+1. Return at most {max_aspects} aspects
+2. Each aspect must cover a different part of the topic, with as little overlap as possible
+3. Each aspect must be self-contained: a short phrase that makes sense as a research topic on its own
+</REQUIREMENTS>
+
+<FORMAT>
+Format your response as a JSON object with this exact key:
+   - "aspects": A list of short aspect descriptions
+</FORMAT>
+
+<EXAMPLE>
+Example output:
+{{
+    "aspects": [
+        "transformer model architecture and attention",
+        "training cost and hardware requirements",
+        "industry applications of transformer models"
+    ]
+}}
+</EXAMPLE>
+
+Provide your response in JSON format:"""
+
+aspect_merge_instructions = """
+<GOAL>
+Merge several summaries, each covering one aspect of the same topic, into a single summary organized into exactly these four sections:
+  1. **Background**
+  2. **Academic Findings**
+  3. **Industry Examples**
+  4. **Recommendations**
+</GOAL>
+
+<REQUIREMENTS>
+1. Keep every relevant point from every aspect summary; drop only repetitions.
+2. Combine related points from different aspects into the same paragraph.
+3. Use the exact section headings **Background**, **Academic Findings**, **Industry Examples**, **Recommendations**
+</REQUIREMENTS>
+
+<FORMATTING>
+- Start directly with the merged summary, without preamble or titles. Do not use XML tags in the output.
+</FORMATTING>
+"""
@@ -0,0 +1,77 @@
+"""Registry of research source plug-ins.
+
+Each source the graph can research is described by a Provider entry. The
+function implementing it is referenced by an import path and only loaded
+when the source is enabled in Configuration, so disabled providers (and
+their client libraries) add nothing to graph import time.
+"""
+
+import importlib
+from dataclasses import dataclass
+from functools import cache
+from typing import Callable
+
+from assistant.configuration import Configuration
+
+
+@dataclass(frozen=True)
+class Provider:
+    """A research source plug-in."""
+
+    node: str  # graph node that runs this provider
+    target: str  # "module:function" fetching results for a query
+    requires: tuple[str, ...] = ()  # Configuration fields that must be set
+
+
+PROVIDERS: dict[str, Provider] = {
+    "tavily": Provider(node="web_research", target="assistant.utils:tavily_search"),
+    "perplexity": Provider(node="web_research", target="assistant.utils:perplexity_search"),
+    "youtube": Provider(
+        node="youtube_research",
+        target="assistant.utils:youtube_search",
+        requires=("youtube_api_key",),
+    ),
+    "wikipedia": Provider(node="wikipedia_research", target="assistant.utils:fetch_wikipedia"),
+    "arxiv": Provider(node="arxiv_research", target="assistant.utils:fetch_arxiv"),
+}
+
+
+def resolve_source(source: str, configurable: Configuration) -> str:
+    """Map a research source name to its provider key ("web" follows search_api)."""
+    if source != "web":
+        return source
+    # search_api is a string when picked in Studio, an Enum when defaulted
+    search_api = configurable.search_api
+    return search_api if isinstance(search_api, str) else search_api.value
+
+
+def is_enabled(name: str, configurable: Configuration) -> bool:
+    """Return True if provider ``name`` is requested and has its requirements met."""
+    requested = {resolve_source(s, configurable) for s in configurable.enabled_sources()}
+    provider = PROVIDERS.get(name)
+    if name not in requested or provider is None:
+        return False
+    return all(getattr(configurable, attr) for attr in provider.requires)
+
+
+def requested_sources(configurable: Configuration) -> list[str]:
+    """Return the provider names listed in research_sources, in order."""
+    names = []
+    for source in configurable.enabled_sources():
+        name = resolve_source(source, configurable)
+        if name not in PROVIDERS:
+            raise ValueError(f"Unsupported research source: {source}")
+        names.append(name)
+    return names
+
+
+def memory_enabled(configurable: Configuration) -> bool:
+    """Return True if Pinecone memory is configured."""
+    return bool(configurable.pinecone_api_key and configurable.pinecone_index_name)
+
+
+@cache
+def load_provider(name: str) -> Callable:
+    """Import and return the fetch function for provider ``name``."""
+    module_name, _, attr = PROVIDERS[name].target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
@@ -0,0 +1,111 @@
+"""Per-run wall-clock budget and graceful degradation.
+
+When ``run_budget_seconds`` is set, the run's first node stamps an absolute
+deadline into the state. Nodes and route_research consult degradation()
+to shed work as the deadline approaches, and wrap their HTTP/LLM calls in
+call_with_deadline() so nothing waits past the budget.
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from assistant.configuration import Configuration
+
+# Fraction of the budget left below which each degradation kicks in
+SKIP_YOUTUBE_BELOW = 0.5
+REDUCE_RESULTS_BELOW = 0.35
+SKIP_REFLECTION_BELOW = 0.2
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call is abandoned because the run budget is spent."""
+
+
+@dataclass(frozen=True)
+class Degradation:
+    """What a node should skip or shrink given the time left in the run."""
+
+    skip_youtube: bool = False
+    reduce_results: bool = False
+    skip_reflection: bool = False
+    finalize: bool = False
+
+
+def new_deadline(configurable: Configuration) -> Optional[float]:
+    """Return the absolute deadline (epoch seconds) for a run starting now."""
+    if not configurable.run_budget_seconds:
+        return None
+    return time.time() + configurable.run_budget_seconds
+
+
+def remaining(deadline: Optional[float]) -> float:
+    """Seconds left before ``deadline`` (infinite when there is none)."""
+    if deadline is None:
+        return math.inf
+    return max(deadline - time.time(), 0.0)
+
+
+def degradation(deadline: Optional[float], configurable: Configuration,
+                started: Optional[float] = None, loops_done: int = 0) -> Degradation:
+    """Decide how far to degrade the run.
+
+    Args:
+        deadline: Absolute deadline from new_deadline(), or None
+        configurable: Run configuration holding run_budget_seconds
+        started: Epoch seconds the run started, used to estimate loop cost
+        loops_done: Research loops completed so far
+    """
+    if deadline is None or not configurable.run_budget_seconds:
+        return Degradation()
+
+    left = remaining(deadline)
+    fraction = left / configurable.run_budget_seconds
+
+    # Finalize early when another loop would not fit in what is left
+    finalize = left <= 0
+    if started is not None and loops_done:
+        finalize = finalize or left < (time.time() - started) / loops_done
+
+    return Degradation(
+        skip_youtube=fraction < SKIP_YOUTUBE_BELOW,
+        reduce_results=fraction < REDUCE_RESULTS_BELOW,
+        skip_reflection=fraction < SKIP_REFLECTION_BELOW,
+        finalize=finalize,
+    )
+
+
+def call_with_deadline(fn: Callable, *args, deadline: Optional[float] = None, **kwargs):
+    """Call ``fn`` but give up once the deadline passes.
+
+    The call runs on a daemon worker thread; when the deadline passes it is
+    abandoned (its result discarded) and DeadlineExceeded is raised, so the
+    node can fall back to what the run already has. An abandoned call keeps
+    running until its own timeout, so callers should also pass
+    ``remaining(deadline)`` as the timeout of the HTTP call it makes.
+    """
+    if deadline is None:
+        return fn(*args, **kwargs)
+    if remaining(deadline) <= 0:
+        raise DeadlineExceeded(getattr(fn, "__name__", repr(fn)))
+
+    outcome = {}
+    done = threading.Event()
+
+    def run():
+        try:
+            outcome["value"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    # A daemon thread never holds up interpreter exit for an abandoned call
+    threading.Thread(target=run, daemon=True).start()
+    if not done.wait(remaining(deadline)):
+        raise DeadlineExceeded(getattr(fn, "__name__", repr(fn)))
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
@@ -0,0 +1,220 @@
+"""Local HTTP front-end that coalesces duplicate research requests.
+
+Concurrent requests for the same normalized topic (and configuration)
+share one in-flight graph run: every waiter receives the same stream of
+node updates, and late joiners first get the events already produced.
+Finished runs are served from a short-TTL, size-capped LRU cache that keeps
+only the final result event, so a burst of duplicate requests costs one
+run instead of N.
+
+    uvicorn assistant.service:app --port 8123
+    curl -N localhost:8123/research -d '{"research_topic": "..."}'
+
+Responses are newline-delimited JSON: one {"event": "update", ...} line per
+node update, then a final {"event": "result", ...} (or {"event": "error"}).
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from assistant.utils import normalize_query
+
+
+class _Flight:
+    """One graph run and the events it has produced so far."""
+
+    def __init__(self):
+        self.events: list[bytes] = []
+        self.done = False
+        self.failed = False
+        self.finished_at: Optional[float] = None
+        self.changed = asyncio.Condition()
+
+    @classmethod
+    def finished(cls, event: bytes) -> "_Flight":
+        """Return a completed run reduced to its final event, for the cache."""
+        flight = cls()
+        flight.events = [event]
+        flight.done = True
+        flight.finished_at = time.time()
+        return flight
+
+    async def publish(self, event: dict[str, Any], last: bool = False) -> None:
+        async with self.changed:
+            self.events.append(json.dumps(event, default=str).encode() + b"\n")
+            if last:
+                self.done = True
+                self.finished_at = time.time()
+            self.changed.notify_all()
+
+    async def follow(self):
+        """Yield every event of the run, waiting for new ones until it is done."""
+        sent = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: len(self.events) > sent or self.done)
+                pending = self.events[sent:]
+                done = self.done
+            for event in pending:
+                yield event
+            sent += len(pending)
+            if done and sent == len(self.events):
+                return
+
+
+class CoalescingService:
+    """ASGI app running the research graph with single-flight request coalescing."""
+
+    def __init__(self, graph=None, cache_ttl: float = 300.0, cache_size: int = 128):
+        """Serve ``graph`` (default: the compiled research graph, on first use).
+
+        Finished results are served for ``cache_ttl`` seconds, for at most
+        ``cache_size`` distinct requests.
+        """
+        self._graph = graph
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        # In-flight runs and finished ones, least recently requested first
+        self._flights: OrderedDict[tuple, _Flight] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def graph(self):
+        """The compiled research graph, imported on first use."""
+        if self._graph is None:
+            from assistant.graph import graph
+
+            self._graph = graph
+        return self._graph
+
+    def _evict(self) -> None:
+        """Drop failed and expired runs, then the least recently used finished ones."""
+        now = time.time()
+        for stale in [k for k, f in self._flights.items()
+                      if f.done and (f.failed or now - f.finished_at > self.cache_ttl)]:
+            del self._flights[stale]
+        finished = [k for k, f in self._flights.items() if f.done]
+        for key in finished[:max(0, len(finished) - self.cache_size)]:
+            del self._flights[key]
+
+    def _flight_for(self, topic: str, configurable: dict) -> _Flight:
+        """Join the in-flight or recently finished run for this request, or start one."""
+        key = (normalize_query(topic), json.dumps(configurable, sort_keys=True, default=str))
+        self._evict()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            task = asyncio.create_task(self._run(key, flight, topic, configurable))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._flights.move_to_end(key)
+        return flight
+
+    def _finish(self, key: tuple, flight: _Flight) -> None:
+        """Cache only the final event of a successful run; followers keep the full one."""
+        if self._flights.get(key) is flight:
+            if flight.failed:
+                del self._flights[key]
+            else:
+                self._flights[key] = _Flight.finished(flight.events[-1])
+        self._evict()
+
+    async def _run(self, key: tuple, flight: _Flight, topic: str, configurable: dict) -> None:
+        result: dict[str, Any] = {}
+        try:
+            async for update in self.graph.astream(
+                {"research_topic": topic},
+                {"configurable": configurable},
+                stream_mode="updates",
+            ):
+                for node, values in update.items():
+                    if isinstance(values, dict):
+                        result.update(
+                            {k: v for k, v in values.items() if k in ("running_summary", "timings")}
+                        )
+                    await flight.publish({"event": "update", "node": node, "values": values})
+        except Exception as e:
+            flight.failed = True
+            await flight.publish({"event": "error", "error": repr(e)}, last=True)
+        else:
+            await flight.publish({"event": "result", **result}, last=True)
+        self._finish(key, flight)
+
+    async def __call__(self, scope, receive, send):
+        """Serve one ASGI connection."""
+        if scope["type"] == "lifespan":
+            while (await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+        if scope["path"] == "/health":
+            await _respond(send, 200, {"status": "ok", "in_flight": sum(
+                not f.done for f in self._flights.values())})
+            return
+        if scope["path"] != "/research" or scope["method"] != "POST":
+            await _respond(send, 404, {"error": "POST /research"})
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        try:
+            request = json.loads(body or b"{}")
+            topic = request["research_topic"]
+        except (ValueError, KeyError):
+            await _respond(send, 400, {"error": "expected JSON with research_topic"})
+            return
+
+        flight = self._flight_for(topic, request.get("configurable", {}))
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson")],
+        })
+        async for event in flight.follow():
+            await send({"type": "http.response.body", "body": event, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def _respond(send, status: int, payload: dict) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+app = CoalescingService()
+
+
+def main() -> None:
+    """Serve the app with uvicorn."""
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the research graph over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--cache-ttl", type=float, default=300.0,
+                        help="seconds a finished result is served to duplicate requests")
+    parser.add_argument("--cache-size", type=int, default=128,
+                        help="most finished results kept for duplicate requests")
+    args = parser.parse_args()
+    app.cache_ttl = args.cache_ttl
+    app.cache_size = args.cache_size
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
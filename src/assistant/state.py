@@ -2,20 +2,52 @@ import operator
 from dataclasses import dataclass, field
 from typing_extensions import TypedDict, Annotated
 
+# Nodes return only their new items; these reducers merge them into state.
+# Per-source results are windowed so state (and every checkpoint) stays the
+# same size however many loops run; summarize_sources only reads the latest,
+# which is an empty block when the source found nothing this loop.
+RESULTS_WINDOW = 1
+
+
+def keep_last(n: int):
+    """Reducer appending new items and keeping only the last ``n``."""
+    def reduce(current: list, update: list) -> list:
+        return (current + update)[-n:]
+    return reduce
+
+
+def add_unique(current: list, update: list) -> list:
+    """Reducer appending new items that are not already present."""
+    return current + [item for item in update if item not in current]
+
+
+def merge_dicts(current: dict, update: dict) -> dict:
+    """Reducer merging new keys into a dict (later values win)."""
+    return {**current, **update}
+
 
 @dataclass(kw_only=True)
 class SummaryState:
     research_topic: str = field(default=None)  # Report topic
     search_query: str = field(default=None)  # Search query
-    web_research_results: Annotated[list, operator.add] = field(default_factory=list)
-    youtube_research_results: list = field(default_factory=list)  # New field for YouTube results
-    wikipedia_research_results: list = field(default_factory=list)
-    arxiv_research_results: list = field(default_factory=list)
-    sources_gathered: Annotated[list, operator.add] = field(default_factory=list)
+    search_queries: list = field(default_factory=list)  # this loop's ranked web queries, search_query first
+    web_research_results: Annotated[list, keep_last(RESULTS_WINDOW)] = field(default_factory=list)
+    youtube_research_results: Annotated[list, keep_last(RESULTS_WINDOW)] = field(default_factory=list)
+    wikipedia_research_results: Annotated[list, keep_last(RESULTS_WINDOW)] = field(default_factory=list)
+    arxiv_research_results: Annotated[list, keep_last(RESULTS_WINDOW)] = field(default_factory=list)
+    sources_gathered: Annotated[list, add_unique] = field(default_factory=list)
     research_loop_count: int = field(default=0)  # Research loop count
     running_summary: str = field(default=None)  # Final report
-    memory: list = field(default_factory=list)  # retrieved embeddings
-    timings: dict = field(default_factory=dict)  # record duration per step and total
+    memory: list = field(default_factory=list)  # retrieved embeddings, replaced by recall_memory (bounded)
+    memory_scores: list = field(default_factory=list)  # recall score of each memory chunk, same order
+    timings: Annotated[dict, merge_dicts] = field(default_factory=dict)  # record duration per step and total
+    deadline: float = field(default=None)  # epoch seconds the run must finish by, if budgeted
+    loop_budget: int = field(default=None)  # caps research loops, e.g. 1 to refresh an archived report
+    reused_report: bool = field(default=False)  # running_summary is an archived report, as is
+    topic_embedding: list = field(default=None)  # research_topic embedded once by lookup_archive
+    aspect: str = field(default=None)  # part of research_topic this branch covers, if split
+    aspects: list = field(default_factory=list)  # aspects researched in parallel, from plan_aspects
+    aspect_summaries: Annotated[list, operator.add] = field(default_factory=list)  # (aspect, summary) per branch
 
 
 @dataclass(kw_only=True)
@@ -26,4 +58,4 @@ class SummaryStateInput:
 @dataclass(kw_only=True)
 class SummaryStateOutput:
     running_summary: str = field(default=None)  # Final report
-    timings: dict = field(default_factory=dict)  # Per-step and total durations in seconds
\ No newline at end of file
+    timings: dict = field(default_factory=dict)  # Per-step and total durations in seconds
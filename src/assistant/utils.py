@@ -1,17 +1,24 @@
 import os
 import re
+import time
+import threading
 import requests
+from collections import OrderedDict
 from typing import Dict, Any
 from langsmith import traceable
-from tavily import TavilyClient
 
-import feedparser
 from urllib.parse import quote_plus
 from typing import List, Dict
+from assistant.cassette import intercept, request_key
 from assistant.configuration import Configuration
+from assistant.memory_index import MemoryIndex, content_id, memory_namespace
 import json
 
-from pinecone import Pinecone, ServerlessSpec
+SEARCH_TIMEOUT_SECONDS = 60  # web search calls; a run's deadline lowers it
+
+# Provider client libraries (tavily, feedparser, pinecone, youtube_transcript_api)
+# are imported inside the functions that use them, so importing this module
+# stays cheap when those providers are disabled.
 
 
 
@@ -83,13 +90,14 @@ def format_sources(search_results):
     )
 
 @traceable
-def tavily_search(query, include_raw_content=True, max_results=3):
+def tavily_search(query, include_raw_content=True, max_results=3, timeout=SEARCH_TIMEOUT_SECONDS):
     """ Search the web using the Tavily API.
     
     Args:
         query (str): The search query to execute
         include_raw_content (bool): Whether to include the raw_content from Tavily in the formatted string
         max_results (int): Maximum number of results to return
+        timeout (float): Seconds to wait for the API before giving up
         
     Returns:
         dict: Search response containing:
@@ -98,19 +106,23 @@ def tavily_search(query, include_raw_content=True, max_results=3):
                 - url (str): URL of the search result
                 - content (str): Snippet/summary of the content
                 - raw_content (str): Full content of the page if available"""
-     
+    from tavily import TavilyClient
+
     tavily_client = TavilyClient()
     return tavily_client.search(query, 
                          max_results=max_results, 
-                         include_raw_content=include_raw_content)
+                         include_raw_content=include_raw_content,
+                         timeout=timeout)
 
 @traceable
-def perplexity_search(query: str, perplexity_search_loop_count: int) -> Dict[str, Any]:
+def perplexity_search(query: str, perplexity_search_loop_count: int,
+                      timeout: float = SEARCH_TIMEOUT_SECONDS) -> Dict[str, Any]:
     """Search the web using the Perplexity API.
     
     Args:
         query (str): The search query to execute
         perplexity_search_loop_count (int): The loop step for perplexity search (starts at 0)
+        timeout (float): Seconds to wait for the API before giving up
   
     Returns:
         dict: Search response containing:
@@ -144,7 +156,8 @@ def perplexity_search(query: str, perplexity_search_loop_count: int) -> Dict[str
     response = requests.post(
         "https://api.perplexity.ai/chat/completions",
         headers=headers,
-        json=payload
+        json=payload,
+        timeout=timeout,
     )
     response.raise_for_status()  # Raise exception for bad status codes
     
@@ -307,11 +320,16 @@ def fetch_wikipedia(query: str, limit: int = 3) -> List[Dict[str, Any]]:
 
 def fetch_arxiv(query: str, max_results: int = 3) -> List[Dict[str, Any]]:
     """Fetch arXiv titles+abstracts as list of dicts with title, url, content, raw_content."""
+    import feedparser
+
     base = "http://export.arxiv.org/api/query?"
     # URL‑encode the query to escape spaces and special chars
     q = quote_plus(query)
     url = f"{base}search_query=all:{q}&start=0&max_results={max_results}"
-    feed = feedparser.parse(url)
+    # Fetch with requests (timeout, recordable) and let feedparser only parse
+    resp = requests.get(url, timeout=10)
+    resp.raise_for_status()
+    feed = feedparser.parse(resp.content)
     
     results = []
     for entry in feed.entries:
@@ -340,6 +358,8 @@ def extract_keywords(text: str, min_len: int = 3) -> list[str]:
 
 def _init_pinecone(cfg: Configuration):
     """Initialize the Pinecone client and return the Index object."""
+    from pinecone import Pinecone
+
     pc = Pinecone(
         api_key=cfg.pinecone_api_key,
         environment=cfg.pinecone_environment,
@@ -348,25 +368,52 @@ def _init_pinecone(cfg: Configuration):
     return pc.Index(cfg.pinecone_index_name)
 
 
-def upsert_to_pinecone(source_id: str, text: str, topic: str, config: Configuration):
-    """Correct way to upsert raw text to Pinecone (integrated embedding version)."""
-    idx = _init_pinecone(config)
-    keywords = extract_keywords(topic)
-    idx.upsert_records(
-        namespace="",
-        records=[{
-            "_id": source_id,
-            "text": text,
-            "keywords": extract_keywords(topic)
-        }]
-    )
+def upsert_to_pinecone(source: str, text: str, topic: str, config: Configuration) -> bool:
+    """Upsert raw text to Pinecone (integrated embedding version).
+
+    The record id is a hash of the text and the namespace is derived from
+    the topic (or the configured tenant). Chunks the local memory index has
+    seen stored within memory_ttl_days are skipped, saving the embedding and
+    the write.
 
-def semantic_recall(query: str, top_k: int, config: Configuration) -> list[str]:
+    Returns:
+        bool: True if a record was written, False if it was a duplicate
+    """
+    namespace = memory_namespace(topic, config)
+    record_id = content_id(text)
+    index = MemoryIndex(config.memory_index_path)
+    if index.seen(namespace, record_id, max_age_days=config.memory_ttl_days):
+        return False
+
+    def upsert():
+        idx = _init_pinecone(config)
+        idx.upsert_records(
+            namespace=namespace,
+            records=[{
+                "_id": record_id,
+                "text": text,
+                "source": source,
+                "keywords": extract_keywords(topic)
+            }]
+        )
+
+    intercept("pinecone:upsert", request_key(namespace, record_id), upsert, optional=True)
+    index.add(namespace, record_id)
+    return True
+
+def _hit_score(hit) -> float:
+    """Similarity score of a Pinecone search hit (0.0 when it has none)."""
+    for name in ("_score", "score"):
+        value = hit.get(name) if isinstance(hit, dict) else getattr(hit, name, None)
+        if value is not None:
+            return float(value)
+    return 0.0
+
+
+def semantic_recall(query: str, top_k: int, config: Configuration, namespace: str = "") -> list[tuple[str, float]]:
     """
-    Retrieve the top_k most similar chunks using Pinecone’s integrated-embedding index.
+    Retrieve the top_k most similar chunks, with their scores, using Pinecone’s integrated-embedding index.
     """
-    # Get your Index instance (not the Pinecone client)
-    idx = _init_pinecone(config)
     kw = extract_keywords(query)
     # Perform a semantic search by text
     query_body: dict[str,Any] = {
@@ -376,16 +423,49 @@ def semantic_recall(query: str, top_k: int, config: Configuration) -> list[str]:
     if kw:
         query_body["filter"] = {"keywords": {"$in": kw}}
 
-    resp = idx.search(
-        namespace="",
-        query=query_body,
-        fields=["text"]
-    )
-
-    matches = getattr(resp, "matches", []) or resp.get("result", {}).get("hits", [])
-    return [m.fields["text"] for m in matches if getattr(m, "fields", None)]
-
-
+    def search():
+        # Get your Index instance (not the Pinecone client)
+        idx = _init_pinecone(config)
+        resp = idx.search(
+            namespace=namespace,
+            query=query_body,
+            fields=["text"]
+        )
+        matches = getattr(resp, "matches", []) or resp.get("result", {}).get("hits", [])
+        return [(m.fields["text"], _hit_score(m)) for m in matches if getattr(m, "fields", None)]
+
+    return intercept("pinecone:search", request_key(namespace, query_body), search)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so near-identical queries match."""
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+# Recall results keyed by (index, namespace, normalized query, top_k) -> (fetched_at, scored chunks)
+_RECALL_CACHE: "OrderedDict[tuple, tuple[float, list[tuple[str, float]]]]" = OrderedDict()
+_RECALL_CACHE_SIZE = 256
+_RECALL_CACHE_TTL = 600  # seconds; memory grows as runs upsert, so keep entries short-lived
+_RECALL_CACHE_LOCK = threading.Lock()
+
+
+def cached_semantic_recall(query: str, top_k: int, config: Configuration,
+                           namespace: str = "") -> list[tuple[str, float]]:
+    """semantic_recall() with a per-process LRU cache keyed by the normalized query."""
+    key = (config.pinecone_index_name, namespace, normalize_query(query), top_k)
+    with _RECALL_CACHE_LOCK:
+        hit = _RECALL_CACHE.get(key)
+        if hit and time.time() - hit[0] < _RECALL_CACHE_TTL:
+            _RECALL_CACHE.move_to_end(key)
+            return list(hit[1])
+
+    recalls = semantic_recall(query, top_k=top_k, config=config, namespace=namespace)
+    with _RECALL_CACHE_LOCK:
+        _RECALL_CACHE[key] = (time.time(), recalls)
+        _RECALL_CACHE.move_to_end(key)
+        while len(_RECALL_CACHE) > _RECALL_CACHE_SIZE:
+            _RECALL_CACHE.popitem(last=False)
+    return list(recalls)
 
 
 def send_discord_message(content: str) -> Dict[str, Any]:
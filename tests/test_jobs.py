@@ -0,0 +1,89 @@
+"""Job queue leases, retries and backoff, with a fake clock."""
+
+import sqlite3
+import threading
+import types
+
+import pytest
+
+import assistant.jobs as jobs_module
+from assistant.jobs import LEASE_SECONDS, RETRY_BACKOFF_SECONDS, JobQueue
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(jobs_module, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"))
+
+
+def test_expired_lease_is_reclaimed_and_the_stale_owner_cannot_complete(queue, clock):
+    job_id = queue.enqueue("topic")
+    assert queue.claim("a").id == job_id
+    assert queue.claim("b") is None  # leased to a
+
+    clock[0] += LEASE_SECONDS + 1
+    job = queue.claim("b")
+    assert (job.id, job.attempts) == (job_id, 2)
+
+    assert not queue.heartbeat(job_id, "a")
+    assert not queue.complete(job_id, "a", {"running_summary": "stale"})
+    assert queue.complete(job_id, "b", {"running_summary": "done"})
+    assert queue.result(job_id)["result"] == {"running_summary": "done"}
+
+
+def test_failed_run_is_retried_after_a_backoff(queue, clock):
+    job_id = queue.enqueue("topic")
+    queue.claim("a")
+    queue.fail(job_id, "a", "boom")
+    assert queue.result(job_id)["status"] == "queued"
+
+    clock[0] += RETRY_BACKOFF_SECONDS - 1
+    assert queue.claim("a") is None
+    clock[0] += 1
+    assert queue.claim("a").attempts == 2
+
+
+def test_job_fails_after_max_attempts(queue, clock):
+    job_id = queue.enqueue("topic", max_attempts=2)
+    queue.claim("a")
+    queue.fail(job_id, "a", "first")
+    clock[0] += RETRY_BACKOFF_SECONDS
+    queue.claim("a")
+    queue.fail(job_id, "a", "second")
+
+    clock[0] += 10 * RETRY_BACKOFF_SECONDS
+    assert queue.claim("a") is None
+    result = queue.result(job_id)
+    assert (result["status"], result["attempts"], result["error"]) == ("failed", 2, "second")
+    assert queue.stats()["failed"] == 1
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(queue, clock):
+    job_id = queue.enqueue("topic", max_attempts=1)
+    queue.claim("a")
+    clock[0] += LEASE_SECONDS + 1
+    assert queue.claim("b") is None
+    assert queue.result(job_id)["error"] == "lease expired"
+
+
+def test_lease_renewal_survives_database_errors():
+    finished = threading.Event()
+    calls = []
+
+    class FlakyQueue:
+        def heartbeat(self, job_id, worker, lease_seconds):
+            calls.append(job_id)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            if len(calls) == 3:
+                finished.set()
+            return True
+
+    jobs_module._renew_lease(FlakyQueue(), 7, "a", 0.03, finished)
+    assert calls == [7, 7, 7]
@@ -0,0 +1,121 @@
+"""Ollama endpoints: OLLAMA_HOST default, least-loaded selection, affinity, failover, probes."""
+
+import httpx
+import langchain_ollama
+import pytest
+import requests
+from langchain_core.messages import AIMessage, HumanMessage
+
+import assistant.llm as llm_module
+from assistant.configuration import Configuration
+from assistant.llm import AFFINITY_SLACK, HEALTH_RETRY_SECONDS, OllamaPool
+
+URLS = ["http://a:11434", "http://b:11434"]
+
+
+def test_ollama_host_is_the_default_endpoint(monkeypatch):
+    monkeypatch.delenv("OLLAMA_BASE_URLS", raising=False)
+    monkeypatch.setenv("OLLAMA_HOST", "gpu-box")
+    assert Configuration.from_runnable_config().ollama_base_urls == "http://gpu-box:11434"
+    per_run = {"configurable": {"ollama_base_urls": URLS[0]}}
+    assert Configuration.from_runnable_config(per_run).ollama_base_urls == URLS[0]
+
+
+def test_acquire_picks_the_least_loaded_endpoint():
+    pool = OllamaPool(URLS)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.url, second.url} == set(URLS)
+    pool.release(first)
+    assert pool.acquire() is first
+
+
+def test_session_stays_on_its_endpoint_within_the_slack():
+    pool = OllamaPool(URLS)
+    pinned = pool.acquire("run")
+    pool.release(pinned)
+    other = next(ep for ep in pool.endpoints if ep is not pinned)
+
+    pinned.in_flight = other.in_flight + AFFINITY_SLACK
+    assert pool.acquire("run") is pinned
+    pinned.in_flight = other.in_flight + AFFINITY_SLACK + 2
+    assert pool.acquire("run") is other
+    # The session now follows the endpoint it moved to
+    other.in_flight = pinned.in_flight
+    assert pool.acquire("run") is other
+
+
+def test_down_endpoint_sits_out_its_cool_down_then_is_probed(monkeypatch):
+    pool = OllamaPool(URLS)
+    down = pool.endpoints[0]
+    pool.release(pool.acquire(exclude=frozenset([URLS[1]])), failed=True)
+    probes = []
+
+    def get(url, timeout):
+        probes.append(url)
+        response = requests.Response()
+        response.status_code = 200 if len(probes) > 1 else 503
+        return response
+
+    monkeypatch.setattr(requests, "get", get)
+    assert pool.acquire().url == URLS[1]
+    assert probes == []  # still cooling down
+
+    down.down_since -= HEALTH_RETRY_SECONDS + 1
+    assert not down.available()  # the probe fails: down for another cool-down
+    assert down.down_since is not None and probes == [f"{URLS[0]}/api/version"]
+
+    down.down_since -= HEALTH_RETRY_SECONDS + 1
+    assert down.available()
+    assert down.down_since is None
+
+
+class _FakeChatOllama:
+    """ChatOllama stand-in; hosts listed in ``unreachable`` refuse connections."""
+
+    unreachable: set = set()
+    calls: list = []
+
+    def __init__(self, base_url, model, keep_alive, **kwargs):
+        self.base_url = base_url
+
+    def invoke(self, messages):
+        self.calls.append(self.base_url)
+        if self.base_url in self.unreachable:
+            raise httpx.ConnectError("connection refused")
+        return AIMessage(content=self.base_url)
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    monkeypatch.setattr(langchain_ollama, "ChatOllama", _FakeChatOllama)
+    monkeypatch.setattr(_FakeChatOllama, "unreachable", set())
+    monkeypatch.setattr(_FakeChatOllama, "calls", [])
+    monkeypatch.setattr(llm_module, "_pools", {})
+    return _FakeChatOllama
+
+
+def test_invoke_fails_over_to_the_next_endpoint(fake_ollama):
+    configurable = Configuration(ollama_base_urls=",".join(URLS))
+    fake_ollama.unreachable = {URLS[0]}
+    # Pin the session to the unreachable host first
+    pool = llm_module.get_pool(configurable)
+    pool.release(pool.acquire("run", exclude=frozenset([URLS[1]])))
+
+    result = llm_module._invoke_on_pool(configurable, "summarize_sources", [HumanMessage(content="hi")],
+                                        deadline=None, session="run")
+
+    assert result.content == URLS[1]
+    assert fake_ollama.calls == URLS
+    assert pool.endpoints[0].down_since is not None
+    assert all(ep.in_flight == 0 for ep in pool.endpoints)
+
+
+def test_invoke_raises_when_every_endpoint_is_unreachable(fake_ollama):
+    configurable = Configuration(ollama_base_urls=",".join(URLS))
+    fake_ollama.unreachable = set(URLS)
+
+    with pytest.raises(httpx.ConnectError):
+        llm_module._invoke_on_pool(configurable, "generate_query", [HumanMessage(content="hi")],
+                                   deadline=None, session=None)
+    assert sorted(fake_ollama.calls) == URLS
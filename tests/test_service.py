@@ -0,0 +1,109 @@
+"""Request coalescing and the finished-result cache of the HTTP front-end."""
+
+import asyncio
+import json
+import types
+
+import pytest
+
+import assistant.service as service_module
+from assistant.service import CoalescingService
+
+
+class FakeGraph:
+    """Streams a few node updates per run, slowly enough for requests to overlap."""
+
+    def __init__(self, fail: bool = False):
+        self.runs = []
+        self.fail = fail
+
+    async def astream(self, state, config, stream_mode):
+        self.runs.append(state["research_topic"])
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield {"summarize_sources": {"running_summary": f"{state['research_topic']} {i}"}}
+        if self.fail:
+            raise RuntimeError("boom")
+
+
+async def _request(app, topic):
+    """POST /research and return the response's NDJSON events."""
+    body = json.dumps({"research_topic": topic}).encode()
+    messages = [{"type": "http.request", "body": body}]
+    chunks = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        chunks.append(message.get("body", b""))
+
+    await app({"type": "http", "path": "/research", "method": "POST"}, receive, send)
+    return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(service_module, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_concurrent_duplicate_topics_share_one_run(clock):
+    graph = FakeGraph()
+    app = CoalescingService(graph)
+    topics = ["KV cache reuse", "kv cache reuse", "KV  cache reuse!", "Kv Cache Reuse?",
+              "kv-cache reuse", " KV cache reuse "]
+
+    async def main():
+        return await asyncio.gather(*(_request(app, topic) for topic in topics))
+
+    responses = asyncio.run(main())
+    assert len(graph.runs) == 1
+    assert all(response == responses[0] for response in responses)
+    assert [event["event"] for event in responses[0]] == ["update"] * 3 + ["result"]
+    assert responses[0][-1]["running_summary"] == "KV cache reuse 2"
+
+
+def test_finished_result_is_cached_until_its_ttl(clock):
+    graph = FakeGraph()
+    app = CoalescingService(graph, cache_ttl=60)
+
+    async def main():
+        first = await _request(app, "topic")
+        clock[0] += 30
+        cached = await _request(app, "topic")
+        clock[0] += 31
+        expired = await _request(app, "topic")
+        return first, cached, expired
+
+    first, cached, expired = asyncio.run(main())
+    # The cache keeps only the final result event
+    assert cached == first[-1:]
+    assert expired == first
+    assert len(graph.runs) == 2
+
+
+def test_least_recently_requested_result_is_evicted(clock):
+    graph = FakeGraph()
+    app = CoalescingService(graph, cache_size=2)
+
+    async def main():
+        for topic in ["one", "two", "one", "three", "one", "two"]:
+            await _request(app, topic)
+
+    asyncio.run(main())
+    # "two" was the least recently requested when "three" finished
+    assert graph.runs == ["one", "two", "three", "two"]
+
+
+def test_failed_run_is_not_cached(clock):
+    graph = FakeGraph(fail=True)
+    app = CoalescingService(graph)
+
+    async def main():
+        return [await _request(app, "topic") for _ in range(2)]
+
+    first, second = asyncio.run(main())
+    assert first[-1]["event"] == "error" and second[-1]["event"] == "error"
+    assert len(graph.runs) == 2
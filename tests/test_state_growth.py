@@ -0,0 +1,123 @@
+"""State regression tests: a 20-loop run must not grow its state.
+
+Runs the compiled graph with every source and memory recall enabled, with
+the LLM, search providers, Pinecone and delivery stubbed out, and checks the
+serialized state after each loop. ``sources_gathered`` is excluded: it is
+meant to accumulate one line per new source for the final report. The
+per-source results window must also not carry a source's old results into
+a loop where it found nothing.
+"""
+
+import itertools
+import json
+import pickle
+
+from langchain_core.messages import AIMessage
+
+import assistant.graph as graph_module
+from assistant.configuration import Configuration
+from assistant.scheduler import DeadlineExceeded
+
+LOOPS = 20
+MEMORY_MAX_CHUNKS = 20
+TOLERANCE = 1.05
+
+
+def _stub_external_calls(monkeypatch):
+    """Stub out every external call; return the summarizer prompts and recall queries."""
+    counter = itertools.count()
+    prompts = []
+    recalls = []
+
+    def invoke_llm(configurable, node, messages, **kwargs):
+        n = next(counter)
+        if node == "summarize_sources":
+            prompts.append(messages[-1].content)
+        if node in ("generate_query", "reflect_on_summary"):
+            return AIMessage(content=json.dumps({"query": f"query {n}", "follow_up_query": f"query {n}"}))
+        return AIMessage(content=f"summary {n} " + "s" * 6000)
+
+    def results(query, *args, **kwargs):
+        n = next(counter)
+        return [{"url": f"https://example.com/{n}/{i}", "title": f"{query} {i}",
+                 "content": "c" * 500, "raw_content": "r" * 4000} for i in range(3)]
+
+    def load_provider(name):
+        # Wikipedia and arXiv return a list of results, the others a response dict
+        if name in ("wikipedia", "arxiv"):
+            return results
+        return lambda *args, **kwargs: {"results": results(*args, **kwargs)}
+
+    def recall(query, top_k, config, namespace=""):
+        n = next(counter)
+        recalls.append(query)
+        return [(f"memory {n}-{i} " + "m" * 1500, (n * 7 + i) % 11 / 10) for i in range(top_k)]
+
+    monkeypatch.setattr(graph_module, "invoke_llm", invoke_llm)
+    monkeypatch.setattr(graph_module, "load_provider", load_provider)
+    monkeypatch.setattr(graph_module, "cached_semantic_recall", recall)
+    monkeypatch.setattr(graph_module, "upsert_to_pinecone", lambda **kwargs: True)
+    monkeypatch.setattr(graph_module, "send_email", lambda state, config: {})
+    monkeypatch.setattr(graph_module, "send_to_discord", lambda state, config: {})
+    return prompts, recalls
+
+
+def test_state_stays_bounded_over_a_long_run(monkeypatch):
+    _stub_external_calls(monkeypatch)
+    values = {
+        "max_web_research_loops": LOOPS - 1,  # route_research loops while count <= max
+        "memory_max_chunks": MEMORY_MAX_CHUNKS,
+        "youtube_api_key": "test",
+        "pinecone_api_key": "test",
+        "pinecone_index_name": "test",
+    }
+    graph = graph_module.build_graph(Configuration(**values))
+    config = {"configurable": values, "recursion_limit": 20 * LOOPS}
+
+    sizes = {}
+    for state in graph.stream({"research_topic": "state growth"}, config, stream_mode="values"):
+        state = state if isinstance(state, dict) else vars(state)
+        loop = state.get("research_loop_count", 0)
+        if loop and loop not in sizes:  # right after summarize_sources, before finalizing
+            sizes[loop] = len(pickle.dumps({k: v for k, v in state.items() if k != "sources_gathered"}))
+
+    assert max(sizes) == LOOPS
+    # Memory fills up after MEMORY_MAX_CHUNKS / memory_top_k loops; from then
+    # on the state must not grow with the loop count
+    steady = [sizes[loop] for loop in sorted(sizes) if loop > MEMORY_MAX_CHUNKS // 5]
+    assert max(steady) <= min(steady) * TOLERANCE, sizes
+
+
+def test_source_that_finds_nothing_drops_out_of_the_next_prompt(monkeypatch):
+    prompts, _ = _stub_external_calls(monkeypatch)
+    load_provider = graph_module.load_provider
+    calls = itertools.count()
+
+    def youtube(*args, **kwargs):
+        # Only the first loop's fetch finishes in time
+        if next(calls):
+            raise DeadlineExceeded("youtube")
+        return {"results": [{"url": "https://youtube.com/watch?v=1", "title": "first loop video",
+                             "content": "c", "raw_content": "first loop transcript"}]}
+
+    monkeypatch.setattr(graph_module, "load_provider",
+                        lambda name: youtube if name == "youtube" else load_provider(name))
+    values = {"max_web_research_loops": 2, "youtube_api_key": "test"}
+    graph = graph_module.build_graph(Configuration(**values))
+    graph.invoke({"research_topic": "stale sources"}, {"configurable": values})
+
+    assert len(prompts) == 3
+    assert "first loop transcript" in prompts[0]
+    assert not any("first loop" in prompt for prompt in prompts[1:])
+
+
+def test_memory_configured_per_run_is_recalled(monkeypatch):
+    prompts, recalls = _stub_external_calls(monkeypatch)
+    graph = graph_module.build_graph(Configuration())  # no Pinecone at build time
+    graph.invoke({"research_topic": "no memory"}, {"configurable": {}})
+    assert recalls == []
+
+    values = {"pinecone_api_key": "test", "pinecone_index_name": "test"}
+    graph.invoke({"research_topic": "per-run memory"}, {"configurable": values})
+    assert len(recalls) == 2  # one recall per loop
+    assert "m" * 1500 in prompts[-1]
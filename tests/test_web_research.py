@@ -0,0 +1,40 @@
+"""web_research with several ranked queries per loop."""
+
+import pytest
+import requests
+
+import assistant.graph as graph_module
+from assistant.state import SummaryState
+
+CONFIG = {"configurable": {"research_sources": "web", "queries_per_loop": 3}}
+QUERIES = ["primary", "extra one", "extra two"]
+
+
+def _stub_tavily(monkeypatch, failing):
+    def tavily(query, **kwargs):
+        if query in failing:
+            raise requests.HTTPError(f"429 for {query}")
+        return {"results": [{"url": f"https://example.com/{query}", "title": query,
+                             "content": query, "raw_content": query}]}
+
+    monkeypatch.setattr(graph_module, "load_provider", lambda name: tavily)
+    monkeypatch.setattr(graph_module, "_remember", lambda *args: None)
+
+
+def test_failed_extra_query_keeps_the_other_results(monkeypatch):
+    _stub_tavily(monkeypatch, failing={"extra one"})
+    state = SummaryState(research_topic="t", search_query=QUERIES[0], search_queries=QUERIES)
+
+    update = graph_module.web_research(state, CONFIG)
+
+    block = update["web_research_results"][0]
+    assert "example.com/primary" in block and "example.com/extra two" in block
+    assert "example.com/extra one" not in block
+
+
+def test_failed_primary_query_fails_the_node(monkeypatch):
+    _stub_tavily(monkeypatch, failing={"primary"})
+    state = SummaryState(research_topic="t", search_query=QUERIES[0], search_queries=QUERIES)
+
+    with pytest.raises(requests.HTTPError):
+        graph_module.web_research(state, CONFIG)